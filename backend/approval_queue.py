@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import numpy as np
+
+from phonetic_index import PhoneticIndex
+from similarity import find_conflict, phonetic_similarity
+
+
+class ApprovalQueue:
+    """
+    Single writer for approvals. /verify hands over the title with the embedding
+    it already computed for the similarity search; one task drains the queue,
+    re-checks each approval against titles registered after that request searched
+    (and against earlier ones in the same group), appends the survivors to the
+    log and index in one call, then inserts them in one SQLite transaction.
+
+    A request notes the registry size (db.index.ntotal, the same row numbering in
+    every worker) before it searches; rows past it are ones it could not have
+    seen. The re-check runs inside the registration, after this process caught up
+    with every worker's approvals (under the registry lock in shared mode), so two
+    concurrent near-duplicates cannot both get through. If those rows are older than
+    db.recent holds, the title is searched against the index again instead.
+    """
+
+    def __init__(self, db, max_batch_size=64, max_wait_ms=2.0):
+        self.db = db
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+
+        # Metrics
+        self.submitted = 0
+        self.groups = 0
+        self.conflicts = 0
+        self.researched = 0
+        self.commit_time_total = 0.0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        # Lets queued approvals commit before the worker exits
+        if self._worker is not None:
+            await self._queue.put(None)
+            await self._worker
+            self._worker = None
+
+    async def submit(self, title, emb, seen_rows):
+        """
+        Returns None once the title is registered, or (score, other, method) for a
+        conflict. `seen_rows` is db.index.ntotal from before the similarity search.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((title, np.asarray(emb, dtype=np.float32), seen_rows, future))
+        return await future
+
+    async def submit_many(self, titles, embs, seen_rows):
+        return await asyncio.gather(*(self.submit(t, e, seen_rows) for t, e in zip(titles, embs)))
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size and batch[-1] is not None:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                try:
+                    await self._commit(batch)
+                except Exception as e:
+                    print(f"Failed to commit approvals: {e}")
+                    for *_, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+            if stopping:
+                return
+
+    async def _commit(self, batch):
+        started = time.perf_counter()
+        self.submitted += len(batch)
+        self.groups += 1
+
+        # One entry per distinct title; repeats of a title in the group get an exact-match conflict
+        items = {}
+        for title, emb, seen_rows, future in batch:
+            items.setdefault(title, (emb, seen_rows, []))[2].append(future)
+        titles = list(items)
+        embs = np.vstack([emb for emb, _, _ in items.values()])
+        conflicts = {}
+
+        def recheck(titles, embs):
+            # 1. Re-check against approvals the requests could not have seen
+            keep, accepted = [], {}
+            for i, (title, emb) in enumerate(zip(titles, embs)):
+                conflict = self._conflict(title, emb, items[title][1], accepted)
+                if conflict is not None:
+                    conflicts[title] = conflict
+                else:
+                    keep.append(i)
+                    accepted[title] = emb
+            return keep
+
+        # 2. Append the group's vectors to the log and index without re-embedding
+        registered = await self.db.add_embedded(titles, embs, recheck)
+
+        # 3. One SQLite transaction for the group (row-by-row only if a duplicate slips in)
+        if registered:
+            rows = {title: i for i, title in enumerate(titles)}
+            await asyncio.to_thread(self.db.insert_records, registered, embs[[rows[t] for t in registered]])
+
+        self.commit_time_total += time.perf_counter() - started
+        registered = set(registered)
+        for title, (_, _, futures) in items.items():
+            # Not registered without a conflict: another request registered the same title first
+            exact = (100.0, title, "Exact match")
+            results = [None] + [exact] * (len(futures) - 1) if title in registered else [conflicts.get(title, exact)] * len(futures)
+            for future, result in zip(futures, results):
+                if result is not None:
+                    self.conflicts += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def _conflict(self, title, emb, seen_rows, accepted):
+        since = self.db.rows_since(seen_rows)
+        if since is None:
+            # Too many registrations since this request searched: search again
+            self.researched += 1
+            best = self._research(title, emb)
+            if best is not None:
+                return best
+            since = []
+
+        others = dict(since)
+        others.update(accepted)
+        if not others:
+            return None
+
+        phonetic = PhoneticIndex()
+        phonetic.add_many(others)
+        return find_conflict(title, emb, others, phonetic)
+
+    def _research(self, title, emb, threshold=50):
+        # The /verify scoring (semantic hits + phonetic candidates) against the whole index
+        candidates = self.db.search_embedding(emb)
+        candidates += [(other, 0.0) for other in self.db.phonetic_candidates(title)]
+        best = None
+        for other, sem_score in candidates:
+            for score, method in ((sem_score, "FAISS cosine similarity"), phonetic_similarity(title, other)):
+                if score >= threshold and (best is None or score > best[0]):
+                    best = (score, other, method)
+        return best
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "groups": self.groups,
+            "avg_group_size": round(self.submitted / self.groups, 2) if self.groups else 0.0,
+            "conflicts": self.conflicts,
+            "researched": self.researched,
+            "avg_commit_ms": round(self.commit_time_total / self.groups * 1000, 3) if self.groups else 0.0,
+        }
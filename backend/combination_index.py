@@ -0,0 +1,184 @@
+import bisect
+import re
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _words(title):
+    return _WORD_RE.findall(title.lower())
+
+
+def _key(title):
+    return "".join(_words(title)).encode("utf-8")
+
+
+class _PackedStrings:
+    """Read-only sequence of byte strings stored in one blob plus an offsets array."""
+
+    def __init__(self, values):
+        self._blob = b"".join(values)
+        offsets = np.zeros(len(values) + 1, dtype=np.uint32 if len(self._blob) < 2 ** 32 else np.uint64)
+        np.cumsum([len(v) for v in values], out=offsets[1:])
+        self._offsets = memoryview(offsets)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+
+def _lead(key):
+    # First two bytes as one number; keys sorted as bytes have non-decreasing leads
+    return key[0] << 8 | (key[1] if len(key) > 1 else 0)
+
+
+class CombinationIndex:
+    """
+    Every registered title with spaces and punctuation removed ("Times of India"
+    -> "timesofindia"), as sorted UTF-8 keys, for word-break segmentation of
+    submissions. decompose() extends a prefix of the submission one character at
+    a time from every position the segmentation can reach, narrowing a binary
+    search over the keys, so its cost depends on the title's length (times the
+    longest registered key and log of the registry size).
+
+    The keys and titles of a bulk load are packed into two byte blobs (a few
+    bytes of overhead per title instead of a dict node per character). Titles
+    registered while serving go to a sorted list beside them; only the next bulk
+    load (startup, or a snapshot adopted from another worker) folds them in, so
+    an approval never waits for a repack.
+
+    A part may cut through a word of the submission ("indiatimes") only if it is
+    at least `min_part` characters; parts on word boundaries are always allowed,
+    so two-letter titles cannot make every word decomposable.
+    """
+
+    # A call adding more titles than this (and than an eighth of the packed part) repacks
+    MIN_BULK = 1024
+
+    def __init__(self, min_part=4):
+        self.min_part = min_part
+        # Packed part: sorted unique keys and, at the same position, the first title with that key
+        self._keys = _PackedStrings([])
+        self._titles = _PackedStrings([])
+        # Keys with lead c are self._keys[self._lead_starts[c]:self._lead_starts[c + 1]]
+        self._lead_starts = np.zeros(1 << 16 | 1, dtype=np.uint32)
+        # Unpacked part: sorted keys not in the packed part, and key -> title
+        self._delta_keys = []
+        self._delta = {}
+
+    def add(self, title):
+        self.add_many([title])
+
+    def add_many(self, titles):
+        if len(titles) > max(self.MIN_BULK, len(self._keys) // 8):
+            self._pack(titles)
+            return
+        for title in titles:
+            key = _key(title)
+            if key and key not in self._delta and not self._contains(key):
+                self._delta[key] = title
+                bisect.insort(self._delta_keys, key)
+
+    def _pack(self, titles):
+        # Rebuilds the packed part from itself, the unpacked list and `titles`;
+        # a key keeps the title it was first registered with
+        entries = {self._keys[i]: self._titles[i] for i in range(len(self._keys))}
+        for key in self._delta_keys:
+            entries.setdefault(key, self._delta[key].encode("utf-8"))
+        for title in titles:
+            key = _key(title)
+            if key:
+                entries.setdefault(key, title.encode("utf-8"))
+        keys = sorted(entries)
+        self._keys = _PackedStrings(keys)
+        self._titles = _PackedStrings([entries[key] for key in keys])
+        leads = np.fromiter((_lead(key) for key in keys), dtype=np.uint32, count=len(keys))
+        self._lead_starts = np.searchsorted(leads, np.arange((1 << 16) + 1)).astype(np.uint32)
+        self._delta_keys = []
+        self._delta = {}
+
+    def __len__(self):
+        return len(self._keys) + len(self._delta)
+
+    def _contains(self, key):
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def _extensions(self, key, start, ends):
+        """Yields (end, title) for every registered key equal to key[start:end], shortest first."""
+        # Per layer, the range of keys starting with the current prefix; it only shrinks
+        ranges = [[0, len(self._keys)], [0, len(self._delta_keys)]]
+        for end in ends:
+            prefix = key[start:end]
+            found = None
+            for layer, keys in enumerate((self._keys, self._delta_keys)):
+                lo, hi = ranges[layer]
+                if lo >= hi:
+                    continue
+                if layer == 0 and len(prefix) <= 2:
+                    # Up to two bytes: the range comes from the lead table, no search
+                    first = _lead(prefix)
+                    lo, hi = int(self._lead_starts[first]), int(self._lead_starts[first + 1 if len(prefix) == 2 else first + 256])
+                else:
+                    # UTF-8 never contains 0xff, so prefix + 0xff sorts after every key starting with prefix
+                    lo = bisect.bisect_left(keys, prefix, lo, hi)
+                    hi = bisect.bisect_left(keys, prefix + b"\xff", lo, hi)
+                ranges[layer] = [lo, hi]
+                if found is None and lo < hi and len(keys[lo]) == len(prefix):
+                    found = self._titles[lo].decode("utf-8") if layer == 0 else self._delta[prefix]
+            if ranges[0][0] >= ranges[0][1] and ranges[1][0] >= ranges[1][1]:
+                return
+            if found is not None:
+                yield end, found
+
+    def decompose(self, title):
+        """
+        Fewest registered titles (at least two) that concatenate to `title`,
+        ignoring case, spaces and punctuation; None if there is no such cover.
+        """
+        words = _words(title)
+        text = "".join(words)
+        n = len(text)
+        if n == 0 or not len(self):
+            return None
+        boundaries = {0}
+        for word in words:
+            boundaries.add(max(boundaries) + len(word))
+
+        # Byte offset of every character position in the UTF-8 key
+        key = text.encode("utf-8")
+        offsets = [0]
+        for ch in text:
+            offsets.append(offsets[-1] + len(ch.encode("utf-8")))
+        position = {offset: i for i, offset in enumerate(offsets)}
+
+        # parts[j]: fewest parts covering text[:j]; back[j]: (start, title) of the last one
+        parts = [None] * (n + 1)
+        back = [None] * (n + 1)
+        parts[0] = 0
+        for i in range(n):
+            if parts[i] is None:
+                continue
+            for end_offset, found in self._extensions(key, offsets[i], offsets[i + 1:]):
+                end = position[end_offset]
+                if i == 0 and end == n:
+                    # The whole title matching one registered title is not a combination
+                    continue
+                if end - i < self.min_part and not (i in boundaries and end in boundaries):
+                    continue
+                if parts[end] is None or parts[i] + 1 < parts[end]:
+                    parts[end] = parts[i] + 1
+                    back[end] = (i, found)
+
+        if parts[n] is None:
+            return None
+        result = []
+        end = n
+        while end > 0:
+            start, found = back[end]
+            result.append(found)
+            end = start
+        return result[::-1]
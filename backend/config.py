@@ -1,8 +1,72 @@
 import os
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+PIPELINE_DIR = os.path.join(os.path.dirname(__file__), "../data_pipeline")
+
 class Config:
     DEBUG = True
     MODEL_SERVICE_URL = os.getenv("MODEL_SERVICE_URL", "http://localhost:8001/embed")
     PORT = int(os.getenv("PORT", 8080))
+    # Identifies the embedding model; cached vectors from another model are never reused
+    MODEL_NAME = os.getenv("MODEL_NAME", "paraphrase-multilingual-MiniLM-L12-v2")
+    # Output dimension of that model (a distilled student-title-model is usually smaller);
+    # a pre-built faiss_index.bin of another dimension takes precedence
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
+    # Titles sent per /embed_batch request when seeding or bulk-inserting
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 256))
+    # Async model-service client: per-request timeouts (seconds), pool size and in-flight cap
+    MODEL_SERVICE_TIMEOUT = float(os.getenv("MODEL_SERVICE_TIMEOUT", 10))
+    MODEL_SERVICE_BATCH_TIMEOUT = float(os.getenv("MODEL_SERVICE_BATCH_TIMEOUT", 60))
+    MODEL_SERVICE_MAX_CONNECTIONS = int(os.getenv("MODEL_SERVICE_MAX_CONNECTIONS", 16))
+    MODEL_SERVICE_MAX_IN_FLIGHT = int(os.getenv("MODEL_SERVICE_MAX_IN_FLIGHT", 16))
+    # Ask the model service for raw float32 embeddings instead of JSON number lists
+    MODEL_SERVICE_BINARY = os.getenv("MODEL_SERVICE_BINARY", "1") == "1"
+    # SQLite registry of approved titles
+    TITLES_DB_PATH = os.getenv("TITLES_DB_PATH", os.path.join(DATA_DIR, "titles.db"))
+    # Embedding cache: in-process LRU entries, on-disk store ("" disables the disk tier) and its row bound
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+    EMBEDDING_CACHE_DISK_SIZE = int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", 200000))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.db"))
+    # ANN search: index type used when no pre-built index exists (flat|hnsw; an ivf
+    # index must be trained by 6_build_faiss.py) and search-time overrides (0 = keep
+    # the value stored in faiss_index.bin)
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", 32))
+    FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 0))
+    FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", 0))
+    # Index + metadata snapshot files (rewritten by compaction) and the append log replayed on top of them
+    FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", os.path.join(PIPELINE_DIR, "faiss_index.bin"))
+    # Full-precision vectors for a compressed index (6_build_faiss.py --encoding sq8|pq|fp16);
+    # the index returns top_k * FAISS_RERANK_FACTOR candidates that are re-scored against them
+    FAISS_VECTORS_PATH = os.getenv("FAISS_VECTORS_PATH", os.path.join(PIPELINE_DIR, "faiss_vectors.npy"))
+    FAISS_RERANK_FACTOR = int(os.getenv("FAISS_RERANK_FACTOR", 4))
+    TITLE_META_PATH = os.getenv("TITLE_META_PATH", os.path.join(PIPELINE_DIR, "title_meta.bin"))
+    # Legacy JSON id file, only read when TITLE_META_PATH does not exist
+    TITLE_IDS_PATH = os.getenv("TITLE_IDS_PATH", os.path.join(PIPELINE_DIR, "title_ids.json"))
+    TITLE_LOG_PATH = os.getenv("TITLE_LOG_PATH", os.path.join(DATA_DIR, "title_log.bin"))
+    TITLE_LOG_FSYNC = os.getenv("TITLE_LOG_FSYNC", "1") == "1"
+    # Seconds between background compactions (snapshot + log truncation); 0 disables
+    SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", 300))
+    # Rules file, re-checked for changes at most every RULES_RELOAD_INTERVAL seconds (-1 disables)
+    RULES_PATH = os.getenv("RULES_PATH", os.path.join(DATA_DIR, "disallowed_rules.json"))
+    RULES_RELOAD_INTERVAL = float(os.getenv("RULES_RELOAD_INTERVAL", 2))
+    # Phonetic candidates merged with the FAISS hits, and the posting-list scan budget per lookup
+    PHONETIC_CANDIDATES = int(os.getenv("PHONETIC_CANDIDATES", 10))
+    PHONETIC_SCAN_BUDGET = int(os.getenv("PHONETIC_SCAN_BUDGET", 4000))
+    # Shortest registered title that may be matched across a word of the submission ("indiatimes")
+    COMBINATION_MIN_PART = int(os.getenv("COMBINATION_MIN_PART", 4))
+    # Cached /verify verdicts (0 disables); entries are dropped once titles or rules change
+    VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", 10000))
+    # Largest accepted /verify/batch request
+    VERIFY_BATCH_MAX = int(os.getenv("VERIFY_BATCH_MAX", 1000))
+    # Rows per chunk when streaming the titles table at startup
+    DB_STREAM_CHUNK = int(os.getenv("DB_STREAM_CHUNK", 10000))
+    # Approval queue: group size and how long the writer waits to fill a group
+    APPROVAL_BATCH_MAX = int(os.getenv("APPROVAL_BATCH_MAX", 64))
+    APPROVAL_MAX_WAIT_MS = float(os.getenv("APPROVAL_MAX_WAIT_MS", 2))
+    # Multi-worker mode (uvicorn/gunicorn --workers N): workers share the mapped snapshot
+    # and the append log, and pick up each other's approvals via a small control file
+    SHARED_REGISTRY = os.getenv("SHARED_REGISTRY", "0") == "1"
+    SHARED_REGISTRY_PATH = os.getenv("SHARED_REGISTRY_PATH", TITLE_LOG_PATH + ".state")
 
 config = Config()
@@ -1,130 +1,711 @@
+import asyncio
+import fcntl
 import json
 import faiss
 import numpy as np
-import requests
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
+from collections import deque
+from sqlalchemy import create_engine, event, inspect, text, select, insert, update, Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, sessionmaker
 import datetime
 
+from config import config
+from embedding_client import EmbeddingClient
+from embedding_cache import EmbeddingCache
+from title_log import TitleLog
+from phonetic_index import PhoneticIndex
+from combination_index import CombinationIndex
+from title_meta import TitleMeta, AppendableColumn, write_title_meta, STRING_COLUMNS, CODE_COLUMNS
+from metrics import timed
+from title_index import LayeredIndex, read_index_mmap, merged_index_bytes, read_rerank_vectors, write_rerank_vectors
+from shared_registry import SharedRegistry
+from utils.text_cleaner import clean_text
+
 # Read model-service URL from environment (set on Render)
 MODEL_SERVICE_URL = os.getenv("MODEL_SERVICE_URL", "http://127.0.0.1:8001/embed")
+MODEL_SERVICE_BATCH_URL = os.getenv("MODEL_SERVICE_BATCH_URL", MODEL_SERVICE_URL + "_batch")
 print(f"Model service URL: {MODEL_SERVICE_URL}")
 
-# Persistent HTTP session for connection reuse
-http_session = requests.Session()
+# Shared async client: pooled connections, bounded in-flight requests
+embedding_client = EmbeddingClient(
+    MODEL_SERVICE_URL,
+    MODEL_SERVICE_BATCH_URL,
+    timeout=config.MODEL_SERVICE_TIMEOUT,
+    batch_timeout=config.MODEL_SERVICE_BATCH_TIMEOUT,
+    max_connections=config.MODEL_SERVICE_MAX_CONNECTIONS,
+    max_in_flight=config.MODEL_SERVICE_MAX_IN_FLIGHT,
+    binary=config.MODEL_SERVICE_BINARY,
+)
+
+# Normalized-title -> embedding cache (LRU in memory, SQLite on disk)
+embedding_cache = EmbeddingCache(
+    config.EMBEDDING_CACHE_PATH,
+    config.MODEL_NAME,
+    capacity=config.EMBEDDING_CACHE_SIZE,
+    disk_capacity=config.EMBEDDING_CACHE_DISK_SIZE,
+)
+# Newest registry rows (title + vector) kept for the approval writer's re-check
+RECENT_ROWS = 4096
+
 # --- SQLAlchemy Setup ---
-DB_PATH = os.path.join(os.path.dirname(__file__), "../data/titles.db")
+DB_PATH = config.TITLES_DB_PATH
 engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: the startup scan does not block approval commits (and vice versa)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 class TitleRecord(Base):
     __tablename__ = "titles"
     id = Column(Integer, primary_key=True, index=True)
     title_name = Column(String, unique=True, index=True)
     status = Column(String, default="Approved")
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Normalized float32 embedding, the model that produced it, and the cleaned title
+    embedding = Column(LargeBinary, nullable=True)
+    model_version = Column(String, nullable=True)
+    normalized_key = Column(String, index=True, nullable=True)
+
+def _migrate():
+    # create_all does not add columns to a table that already exists
+    existing = {c["name"] for c in inspect(engine).get_columns("titles")}
+    with engine.begin() as conn:
+        for name, sql_type in (("embedding", "BLOB"), ("model_version", "VARCHAR"), ("normalized_key", "VARCHAR")):
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE titles ADD COLUMN {name} {sql_type}"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_titles_normalized_key ON titles (normalized_key)"))
 
-Base.metadata.create_all(bind=engine)
+def _create_schema():
+    # Every worker imports this module at the same time; the DDL runs under an
+    # exclusive flock so only the first creates or migrates the table and the
+    # others find it done (no "table already exists" / "duplicate column" errors)
+    with open(DB_PATH + ".lock", "a+b") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            Base.metadata.create_all(bind=engine)
+            _migrate()
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+_create_schema()
+
+class EmbeddingUnavailable(Exception):
+    """The model service could not embed a title, so it cannot be checked or registered."""
+
+def _record_values(title, emb):
+    values = {"title_name": title, "normalized_key": clean_text(title)}
+    # An all-zero vector is a failed model call: stored as NULL so it is re-embedded later
+    if emb is not None and emb.any():
+        values["embedding"] = np.ascontiguousarray(emb, dtype="<f4").tobytes()
+        values["model_version"] = config.MODEL_NAME
+    return values
 
 # --- FAISS TitleDatabase ---
+def normalized(vectors):
+    # Out of place: binary responses decode to read-only views of the response body
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+def create_empty_index(dimension):
+    if config.FAISS_INDEX_TYPE == "hnsw":
+        return faiss.index_factory(dimension, f"HNSW{config.FAISS_HNSW_M},Flat", faiss.METRIC_INNER_PRODUCT)
+    if config.FAISS_INDEX_TYPE != "flat":
+        print(f"Warning: '{config.FAISS_INDEX_TYPE}' index needs training; falling back to IndexFlatIP.")
+    return faiss.IndexFlatIP(dimension)
+
+def apply_search_params(index):
+    # nprobe only exists on IVF indexes and efSearch on HNSW; ignore the other one
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", config.FAISS_NPROBE), ("efSearch", config.FAISS_EF_SEARCH)):
+        if value > 0:
+            try:
+                params.set_index_parameter(index, name, value)
+            except RuntimeError:
+                pass
+
 class TitleDatabase:
     def __init__(self):
-        self.titles = []
+        # Cheap on purpose: importing this module must not load anything, so the app
+        # can bind its port immediately. load() runs during the startup warm-up.
+        # Titles are decoded lazily from the memory-mapped metadata file;
+        # approvals made while running are appended in memory
+        self.titles = AppendableColumn([])
+        self.metadata = None
         self._titles_set = set()  # Pre-computed lowercase set for O(1) lookups
-        self.dimension = 384 # paraphrase-multilingual-MiniLM-L12-v2 dim
-        self.faiss_path = os.path.join(os.path.dirname(__file__), "../data_pipeline/faiss_index.bin")
-        self.ids_path = os.path.join(os.path.dirname(__file__), "../data_pipeline/title_ids.json")
-        
+        # Bumped whenever titles are added (here or, in shared mode, by another worker),
+        # so results cached against the registry can tell it changed
+        self.version = 0
+        # (row, title, vector) of the latest rows applied here, from any worker, contiguous
+        self.recent = deque(maxlen=RECENT_ROWS)
+        self.dimension = config.EMBEDDING_DIM
+        self.faiss_path = config.FAISS_INDEX_PATH
+        self.vectors_path = config.FAISS_VECTORS_PATH
+        self.meta_path = config.TITLE_META_PATH
+        self.ids_path = config.TITLE_IDS_PATH
+        self.index = LayeredIndex(create_empty_index(self.dimension))
+        self.title_log = None
+        self.phonetic_index = PhoneticIndex(scan_budget=config.PHONETIC_SCAN_BUDGET)
+        self.combination_index = CombinationIndex(min_part=config.COMBINATION_MIN_PART)
+        # Multi-worker mode: snapshot generation and log position this process has applied
+        self.shared = SharedRegistry(config.SHARED_REGISTRY_PATH) if config.SHARED_REGISTRY else None
+        self._generation = 0
+        self._log_offset = 0
+        # Held by whoever appends to the log or swaps snapshot files in this process
+        self._write_lock = asyncio.Lock()
+        self._sync_task = None
+        self.loaded = False
+
+    def load(self):
+        # The warm-up retries a failed load: start again from an empty registry
+        if self.title_log is not None:
+            self.title_log.close()
+            self.title_log = None
+        self.dimension = config.EMBEDDING_DIM
+        self.index = LayeredIndex(create_empty_index(self.dimension))
+        self.titles = AppendableColumn([])
+        self.metadata = None
+        self.recent.clear()
+        self.phonetic_index = PhoneticIndex(scan_budget=config.PHONETIC_SCAN_BUDGET)
+        self.combination_index = CombinationIndex(min_part=config.COMBINATION_MIN_PART)
+
+        if self.shared is not None:
+            # Not while another worker is appending or installing a snapshot; the
+            # in-memory indexes are built after the lock is released, so workers
+            # starting together only queue for the file mapping and log read
+            with self.shared.locked(fcntl.LOCK_EX):
+                titles, vectors = self._map_registry()
+        else:
+            titles, vectors = self._map_registry()
+        self._build_indexes(titles, vectors)
+        self.loaded = True
+
+    def _map_registry(self):
+        """Maps the snapshot files and reads the log records past them; returns those records."""
         # Load pre-trained FAISS index if available
-        if os.path.exists(self.faiss_path) and os.path.exists(self.ids_path):
+        if os.path.exists(self.faiss_path) and (os.path.exists(self.meta_path) or os.path.exists(self.ids_path)):
             print(f"Loading Pre-Trained FAISS Index from {self.faiss_path}...")
-            self.index = faiss.read_index(self.faiss_path)
-            with open(self.ids_path, "r", encoding="utf-8") as f:
-                records = json.load(f)
-                self.titles = [r["original_english"] for r in records if "original_english" in r]
-            self._titles_set = {t.lower() for t in self.titles}
+            base, mapped = read_index_mmap(self.faiss_path)
+            if mapped:
+                print("FAISS index is memory-mapped.")
+            apply_search_params(base)
+            if base.d != self.dimension:
+                # The index was built with another model (e.g. a distilled student)
+                print(f"Warning: FAISS index has {base.d} dims but EMBEDDING_DIM is {self.dimension}; using {base.d}.")
+                self.dimension = base.d
+            vectors = read_rerank_vectors(self.vectors_path, base.ntotal)
+            if vectors is not None:
+                print(f"Re-ranking top {config.FAISS_RERANK_FACTOR}x candidates with full-precision vectors from {self.vectors_path}.")
+            self.index = LayeredIndex(base, vectors, config.FAISS_RERANK_FACTOR)
+            if os.path.exists(self.meta_path):
+                self.metadata = TitleMeta(self.meta_path)
+                self.titles = AppendableColumn(self.metadata.column("original_english"))
+            else:
+                # Legacy pretty-printed id file from older pipeline runs
+                with open(self.ids_path, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                    self.titles = AppendableColumn([r["original_english"] for r in records if "original_english" in r])
+            if len(self.titles) != self.index.ntotal:
+                # Crash between the two snapshot writes: the metadata file is written first,
+                # so extra titles are still in the append log and get replayed with it
+                print(f"Warning: {len(self.titles)} titles but {self.index.ntotal} vectors; trimming to index.")
+                self.titles = AppendableColumn(self.titles[:self.index.ntotal])
             print(f"Successfully loaded {len(self.titles)} titles into memory.")
         else:
             print("Warning: FAISS index not found. Generating empty index.")
-            self.index = faiss.IndexFlatIP(self.dimension)
 
-    def _get_embedding(self, text):
+        # Approvals made since the last snapshot, replayed by _build_indexes (no model calls needed)
+        self.title_log = TitleLog(config.TITLE_LOG_PATH, fsync=config.TITLE_LOG_FSYNC, model=config.MODEL_NAME, dimension=self.dimension)
+        if self.shared is None:
+            titles, vectors = self.title_log.replay()
+        else:
+            state = self.shared.state()
+            if state is None or state[1] > self.title_log.size():
+                # First worker ever, or the log was rewritten outside multi-worker mode
+                self.title_log.replay()
+                state = (state[0] if state else 0, self.title_log.size())
+                self.shared.publish(*state)
+            self._generation, self._log_offset = state
+            titles, vectors = self.title_log.read(0, self._log_offset)
+        return titles, vectors
+
+    def _build_indexes(self, titles, vectors):
+        # Phonetic candidate and combination indexes over the whole registry, kept current on every add
+        self._titles_set = {t.lower() for t in self.titles}
+        self.phonetic_index.add_many(self.titles)
+        self.combination_index.add_many(self.titles)
+
+        replayed = self._apply_log(titles, vectors)
+        if replayed:
+            print(f"Replayed {replayed} titles from append log {config.TITLE_LOG_PATH}.")
+
+    def _apply_log(self, titles, vectors):
+        # Records already in the snapshot (crash before the log was truncated) are skipped
+        keep = []
+        seen = set()
+        for i, title in enumerate(titles):
+            key = title.lower()
+            if key not in self._titles_set and key not in seen:
+                seen.add(key)
+                keep.append(i)
+        if keep:
+            self._apply([titles[i] for i in keep], vectors[keep])
+        return len(keep)
+
+    def _apply(self, titles, embs):
+        self.version += 1
+        start = len(self.titles)
+        self.recent.extend((start + i, title, emb) for i, (title, emb) in enumerate(zip(titles, embs)))
+        self.titles.extend(titles)
+        self._titles_set.update(t.lower() for t in titles)
+        self.phonetic_index.add_many(titles)
+        self.combination_index.add_many(titles)
+        self.index.add(embs)
+
+    def sync(self):
+        """
+        Multi-worker mode: picks up approvals and snapshots published by other workers.
+        Never waits: the catch-up runs as one background task at a time and callers
+        keep using the current state until it has been applied.
+        """
+        if self.shared is None or not self.loaded:
+            return
+        if self.shared.state() == (self._generation, self._log_offset):
+            return
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(self.catch_up())
+
+    async def catch_up(self):
+        # The write lock first: registrations and snapshots catch up themselves, and a
+        # LOCK_SH flock from this process would downgrade their LOCK_EX
+        async with self._write_lock:
+            if self.shared.state() == (self._generation, self._log_offset):
+                return
+            await asyncio.to_thread(self.shared.acquire, fcntl.LOCK_SH)
+            try:
+                await self._catch_up()
+            finally:
+                self.shared.release()
+
+    async def _catch_up(self):
+        # Caller holds the registry lock and _write_lock; the log is read in a worker thread
+        generation, log_end = self.shared.state()
+        if generation != self._generation:
+            self._adopt_snapshot()
+            self.title_log.reopen()
+            self._generation, self._log_offset = generation, 0
+        if log_end > self._log_offset:
+            self._apply_log(*await asyncio.to_thread(self.title_log.read, self._log_offset, log_end))
+            self._log_offset = log_end
+
+    def _adopt_snapshot(self):
+        """Re-maps the snapshot files after a compaction; rows past the snapshot stay in the delta."""
+        base, _ = read_index_mmap(self.faiss_path)
+        apply_search_params(base)
+        metadata = TitleMeta(self.meta_path)
+        column = metadata.column("original_english")
+
+        # Rows another worker folded in before this process had applied them
+        unseen = column[self.index.ntotal:base.ntotal]
+        added_since = self.titles[base.ntotal:]
+        vectors = read_rerank_vectors(self.vectors_path, base.ntotal) if self.index.vectors is not None else None
+        self.index.rebase(base, min(self.index.delta.ntotal, base.ntotal - self.index.base.ntotal), vectors)
+        self.metadata = metadata
+        self.titles = AppendableColumn(column)
+        self.titles.extend(added_since)
+        if unseen:
+            # Their vectors are only in the snapshot; a gap would make rows_since() incomplete
+            self.recent.clear()
+            self.version += 1
+            self._titles_set.update(t.lower() for t in unseen)
+            self.phonetic_index.add_many(unseen)
+            self.combination_index.add_many(unseen)
+
+    async def _get_embedding(self, text):
+        cached = await embedding_cache.get(text)
+        if cached is not None:
+            return cached
         try:
-            res = http_session.post(MODEL_SERVICE_URL, json={"text": text}, timeout=10)
-            res.raise_for_status()
-            emb = np.array(res.json()["embedding"], dtype=np.float32)
-            faiss.normalize_L2(emb.reshape(1, -1))
+            with timed("embed"):
+                emb = await embedding_client.embed(text)
+            emb = normalized(emb)
+            embedding_cache.put(text, emb)
             return emb
         except Exception as e:
             print(f"Error getting embedding: {e}")
-            return np.zeros(self.dimension, dtype=np.float32)
+            raise EmbeddingUnavailable(str(e)) from e
 
-    def load_from_db(self):
-        db_session = SessionLocal()
-        records = db_session.query(TitleRecord).all()
-        
-        # Merge new SQL titles into FAISS if they don't exist in the loaded JSON yet
+    async def _get_embeddings(self, texts):
+        # Bulk counterpart of _get_embedding: one /embed_batch round trip per chunk,
+        # chunks sent concurrently (bounded by the client's in-flight cap).
+        # Rows of a chunk whose call failed stay all-zero
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # Only cache misses go to the model service
+        missing = []
+        for i, cached in enumerate(await embedding_cache.get_many(texts)):
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.append(i)
+
+        chunk_size = config.EMBED_BATCH_SIZE
+
+        async def fetch(start):
+            rows = missing[start:start + chunk_size]
+            chunk = [texts[i] for i in rows]
+            try:
+                with timed("embed"):
+                    embs = await embedding_client.embed_batch(chunk)
+                embs = normalized(embs)
+                embeddings[rows] = embs
+                embedding_cache.put_many(chunk, embs)
+            except Exception as e:
+                print(f"Error getting batch embeddings: {e}")
+
+        await asyncio.gather(*(fetch(start) for start in range(0, len(missing), chunk_size)))
+        return embeddings
+
+    async def load_from_db(self):
+        # Merge SQL titles missing from the index. Stored embeddings are used as-is;
+        # only rows without one (or from another model) go to the model service
+        (titles, vectors), missing = await asyncio.to_thread(self._read_unindexed_rows)
         new_insertions = 0
-        for rec in records:
-            if rec.title_name.lower() not in self._titles_set:
-                self._add_to_faiss(rec.title_name)
-                new_insertions = new_insertions + 1
-                
+        if titles:
+            new_insertions += len(await self.add_embedded(titles, vectors))
+
+        if missing:
+            missing_titles = [title for _, title in missing]
+            embs = await self._get_embeddings(missing_titles)
+            await asyncio.to_thread(self._backfill_embeddings, missing, embs)
+            # Titles the model service failed on are left out until the next startup
+            embedded = [i for i, emb in enumerate(embs) if emb.any()]
+            new_insertions += len(await self.add_embedded([missing_titles[i] for i in embedded], embs[embedded]))
+            print(f"Embedded {len(embedded)} of {len(missing)} SQL titles that had no stored embedding.")
+
         if new_insertions > 0:
             print(f"Injected {new_insertions} new SQL approvals into FAISS index.")
-            
-        db_session.close()
-
-    def _add_to_faiss(self, title):
-        if title.lower() not in self._titles_set:
-            self.titles.append(title)
-            self._titles_set.add(title.lower())
-            emb = self._get_embedding(title)
-            self.index.add(emb.reshape(1, -1))
-
-    def add_title(self, title):
-        # 1. Add to SQLite
+
+    def _read_unindexed_rows(self):
+        """
+        Streams (id, title) in chunks to find rows not in the index, then streams the
+        stored embeddings from the first such row on (approvals missing from a
+        snapshot are the newest ones). Returns ((titles, vectors), missing) where
+        `missing` lists (id, title) rows that need embedding.
+        """
+        wanted = set()
+        with engine.connect() as conn:
+            query = select(TitleRecord.id, TitleRecord.title_name)
+            result = conn.execution_options(yield_per=config.DB_STREAM_CHUNK).execute(query)
+            for rows in result.partitions():
+                wanted.update(row_id for row_id, title in rows if title and title.lower() not in self._titles_set)
+
+            titles, blobs, missing = [], [], []
+            if wanted:
+                query = (
+                    select(TitleRecord.id, TitleRecord.title_name, TitleRecord.embedding, TitleRecord.model_version)
+                    .where(TitleRecord.id >= min(wanted))
+                    .order_by(TitleRecord.id)
+                )
+                result = conn.execution_options(yield_per=config.DB_STREAM_CHUNK).execute(query)
+                vector_bytes = 4 * self.dimension
+                for rows in result.partitions():
+                    for row_id, title, blob, model_version in rows:
+                        if row_id not in wanted:
+                            continue
+                        if blob is not None and model_version == config.MODEL_NAME and len(blob) == vector_bytes:
+                            titles.append(title)
+                            blobs.append(blob)
+                        else:
+                            missing.append((row_id, title))
+
+        # One copy of all stored vectors instead of one array per row
+        vectors = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(len(blobs), self.dimension) if blobs else None
+        return (titles, vectors), missing
+
+    def _backfill_embeddings(self, rows, embs):
+        # Store freshly computed embeddings so the next startup does not need the model
+        # (zero vectors mean the model call failed; those rows are retried next time)
+        values = [
+            {"id": row_id, **_record_values(title, emb)}
+            for (row_id, title), emb in zip(rows, embs) if emb.any()
+        ]
+        if not values:
+            return
+        with SessionLocal() as db_session:
+            db_session.execute(update(TitleRecord), values)
+            db_session.commit()
+
+    def _unregistered(self, titles):
+        pending = []
+        seen = set()
+        for title in titles:
+            key = title.lower()
+            if key not in self._titles_set and key not in seen:
+                seen.add(key)
+                pending.append(title)
+        return pending
+
+    async def _register(self, titles, embs, recheck=None):
+        # Caller holds _write_lock. Title row i and vector row i must stay aligned, so
+        # nothing else appends meanwhile; the log write (and its fsync) runs in a worker
+        # thread and the rows become searchable only once they are durable.
+        # `recheck(titles, embs)` returns the indices to keep; it runs once this
+        # process has every row registered so far (under the registry lock when shared)
+        if not titles:
+            return []
+        if self.shared is None:
+            titles, embs = self._rechecked(titles, embs, recheck)
+            if titles:
+                await asyncio.to_thread(self.title_log.append, titles, embs)
+                self._apply(titles, embs)
+            return titles
+
+        await asyncio.to_thread(self.shared.acquire, fcntl.LOCK_EX)
         try:
-            db_session = SessionLocal()
-            record = TitleRecord(title_name=title, status="Approved")
-            db_session.add(record)
+            # Every worker applies the log in order, so catch up before appending
+            # and drop titles another worker registered in the meantime
+            await self._catch_up()
+            keep = [i for i, title in enumerate(titles) if title.lower() not in self._titles_set]
+            titles, embs = self._rechecked([titles[i] for i in keep], embs[keep], recheck)
+            if not titles:
+                return []
+            await asyncio.to_thread(self._append_shared, titles, embs)
+            self._apply(titles, embs)
+            self._log_offset = self.title_log.size()
+            self.shared.publish(self._generation, self._log_offset)
+        finally:
+            self.shared.release()
+        return titles
+
+    def _append_shared(self, titles, embs):
+        if self.title_log.size() > self._log_offset:
+            # Torn record left by a worker that crashed mid-append
+            self.title_log.truncate(self._log_offset)
+        self.title_log.append(titles, embs)
+
+    @staticmethod
+    def _rechecked(titles, embs, recheck):
+        if recheck is None or not titles:
+            return titles, embs
+        keep = recheck(titles, embs)
+        return [titles[i] for i in keep], embs[keep]
+
+    def rows_since(self, row):
+        """
+        (title, vector) of every row registered at position >= `row`, or None if
+        some of them are no longer in `recent` (the caller must search the index).
+        """
+        if row >= len(self.titles):
+            return []
+        if not self.recent or self.recent[0][0] > row:
+            return None
+        return [(title, emb) for r, title, emb in self.recent if r >= row]
+
+    async def snapshot(self):
+        """
+        Compaction: persist the current index + metadata and drop the log records
+        they now cover, then re-map the new snapshot as the index base. State is
+        captured on the event loop (consistent view); the merge and file writes
+        happen in a worker thread.
+        """
+        if self.title_log is None:
+            return False
+        if self.shared is None:
+            if self.title_log.records == 0:
+                return False
+            return await self._snapshot()
+
+        # One worker compacts at a time; the others adopt the result in sync()
+        with self.shared.compaction() as allowed:
+            if not allowed:
+                return False
+            await self.catch_up()
+            if self._log_offset == 0:
+                return False
+            return await self._snapshot()
+
+    async def _snapshot(self):
+        # Not while a registration is between its log append and applying the rows
+        async with self._write_lock:
+            log_offset = self.title_log.size() if self.shared is None else self._log_offset
+            base, vectors, delta_vectors = self.index.base, self.index.vectors, self.index.delta_vectors()
+            titles = list(self.titles)
+
+        await asyncio.to_thread(self._write_snapshot, base, vectors, delta_vectors, titles)
+
+        # Vectors/titles added while the files were being written stay in the
+        # delta, the in-memory title list and the log
+        async with self._write_lock:
+            if self.shared is None:
+                self._install_snapshot(log_offset)
+                self._adopt_snapshot()
+            else:
+                await asyncio.to_thread(self.shared.acquire, fcntl.LOCK_EX)
+                try:
+                    self._install_snapshot(log_offset)
+                    generation, log_end = self.shared.state()
+                    self.shared.publish(generation + 1, log_end - log_offset)
+                    await self._catch_up()
+                finally:
+                    self.shared.release()
+        print(f"Snapshot written: {len(titles)} titles, {self.title_log.records} log records pending.")
+        return True
+
+    def _write_snapshot(self, base, vectors, delta_vectors, titles):
+        index_bytes = merged_index_bytes(base, delta_vectors)
+        if vectors is not None:
+            # Compressed base: its full-precision copy grows with it
+            write_rerank_vectors(self.vectors_path + ".new", vectors, delta_vectors)
+
+        # Keep the pipeline's metadata (hindi title, state, periodicity) for rows it built
+        columns = {name: [] for name in STRING_COLUMNS + CODE_COLUMNS}
+        for i, title in enumerate(titles):
+            record = self.get_metadata(i)
+            if record.get("original_english") != title:
+                record = {"original_english": title}
+            for name, values in columns.items():
+                values.append(record.get(name, ""))
+
+        # Written next to the live files; _install_snapshot swaps them in
+        write_title_meta(self.meta_path + ".new", columns)
+        index_bytes.tofile(self.faiss_path + ".new")
+
+    def _install_snapshot(self, log_offset):
+        # Metadata first, then index: a crash in between leaves more ids than
+        # vectors, which load() trims before replaying the (untruncated) log.
+        # Re-rank vectors go in between; extra rows there are ignored the same way
+        os.replace(self.meta_path + ".new", self.meta_path)
+        if os.path.exists(self.vectors_path + ".new"):
+            os.replace(self.vectors_path + ".new", self.vectors_path)
+        os.replace(self.faiss_path + ".new", self.faiss_path)
+        self.title_log.discard_before(log_offset)
+
+    async def run_compaction(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.snapshot()
+            except Exception as e:
+                print(f"Snapshot failed: {e}")
+
+    def insert_records(self, titles, embs=None):
+        """
+        Group commit: all rows in one bulk INSERT and one transaction. If that hits a
+        duplicate title the rows are retried one by one, so one bad row does not drop
+        the others. Returns the titles actually inserted.
+        """
+        values = [_record_values(title, embs[i] if embs is not None else None) for i, title in enumerate(titles)]
+        db_session = SessionLocal()
+        try:
+            db_session.execute(insert(TitleRecord), values)
             db_session.commit()
+            return list(titles)
+        except IntegrityError:
+            db_session.rollback()
+        finally:
             db_session.close()
-            # 2. Add to FAISS index in memory
-            self._add_to_faiss(title)
-        except Exception as e:
-            print(f"Failed to insert title into DB: {e}")
 
-    def search_similar(self, title, top_k=5):
+        inserted = []
+        for title, row in zip(titles, values):
+            db_session = SessionLocal()
+            try:
+                db_session.execute(insert(TitleRecord), [row])
+                db_session.commit()
+                inserted.append(title)
+            except IntegrityError:
+                db_session.rollback()
+                print(f"Title already in DB: {title}")
+            finally:
+                db_session.close()
+        return inserted
+
+    async def add_embedded(self, titles, embs, recheck=None):
+        """
+        Registers titles whose normalized embeddings the caller already has (no model
+        call). Returns the titles actually registered, in order.
+        """
+        async with self._write_lock:
+            pending = self._unregistered(titles)
+            if len(pending) < len(titles):
+                rows = {title: i for i, title in enumerate(titles)}
+                embs = embs[[rows[title] for title in pending]]
+            return await self._register(pending, embs, recheck)
+
+    async def search_similar_with_embedding(self, title, top_k=5):
+        # Also returns the query embedding, so an approval can be registered without re-embedding
+        self.sync()
+        emb = await self._get_embedding(title)
+        if len(self.titles) == 0:
+            return [], emb
+
+        return self.search_embedding(emb, top_k), emb
+
+    def search_embedding(self, emb, top_k=5):
+        # Index search for an embedding the caller already has
         if len(self.titles) == 0:
             return []
-        
-        emb = self._get_embedding(title)
-        distances, indices = self.index.search(emb.reshape(1, -1), top_k)
-        
+        with timed("index_search"):
+            distances, indices = self.index.search(emb.reshape(1, -1), top_k)
+        return self._format_hits(distances[0], indices[0])
+
+    async def search_similar_batch(self, titles, top_k=5):
+        # One batched embedding call and a single multi-row index.search for all titles;
+        # the embeddings are returned too so callers can compare titles with each other
+        embs = await self._get_embeddings(titles)
+        if len(embs) and not embs.any(axis=1).all():
+            raise EmbeddingUnavailable("the model service failed on part of the batch")
+        self.sync()
+        if len(self.titles) == 0 or not titles:
+            return [[] for _ in titles], embs
+
+        with timed("index_search"):
+            distances, indices = self.index.search(embs, top_k)
+        return [self._format_hits(distances[r], indices[r]) for r in range(len(titles))], embs
+
+    def _format_hits(self, distances, indices):
         results = []
-        for i in range(len(indices[0])):
-            idx = indices[0][i]
+        for i in range(len(indices)):
+            idx = indices[i]
             if idx != -1:
-                score = float(distances[0][i]) * 100 
+                score = float(distances[i]) * 100 
                 score = min(100.0, score)
                 results.append((self.titles[idx], score))
                 
         return results
 
+    def get_metadata(self, idx):
+        # Full registry record (hindi title, state, periodicity) for an index row
+        if self.metadata is not None and idx < len(self.metadata):
+            return self.metadata[idx]
+        return {"idx": idx, "original_english": self.titles[idx]}
+
+    def phonetic_candidates(self, title, limit=10):
+        return self.phonetic_index.candidates(title, limit=limit)
+
+    def find_combination(self, title):
+        # Registered titles that together make up `title`, or None
+        self.sync()
+        return self.combination_index.decompose(title)
+
     def get_all_titles(self):
         return self.titles
 
     def get_titles_set(self):
+        self.sync()
         return self._titles_set
 
 # Global instance
 db = TitleDatabase()
 
-def load_existing_titles():
+async def load_existing_titles():
     # Only called once on startup to seed FAISS from SQLite
-    db.load_from_db()
+    await db.load_from_db()
     return db.get_all_titles()
 
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# Bumped when the key normalization changes; older disk entries are dropped
+KEY_VERSION = 2
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of title embeddings keyed on (model id, normalized title).
+    Tier 1 is a bounded in-process LRU; tier 2 is a SQLite file that survives
+    restarts, holding at most `disk_capacity` rows (oldest written go first).
+    Titles differing only in case or spacing share an entry.
+    Disk reads run in a worker thread and disk writes are batched by a background
+    writer, so neither blocks the event loop.
+    """
+
+    def __init__(self, path, model_id, capacity=10000, disk_capacity=200000):
+        self.model_id = model_id
+        self.capacity = capacity
+        self.disk_capacity = disk_capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # The SQLite connection has its own lock so disk I/O never holds up memory hits
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        # Rows waiting for the writer thread
+        self._pending = {}
+        self._wake = threading.Condition(self._lock)
+        self._writer = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS embeddings")
+                self._conn.execute(f"PRAGMA user_version = {KEY_VERSION}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, key))"
+            )
+            self._conn.commit()
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def key(text):
+        # Case and whitespace only: punctuation and combining marks (Devanagari
+        # vowel signs) change the title, so they must not share a vector
+        return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, text):
+        return (await self.get_many([text]))[0]
+
+    async def get_many(self, texts):
+        """Cached vector (or None) per text; memory misses share one disk read off the loop."""
+        keys = [self.key(t) for t in texts]
+        results = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = vector
+                else:
+                    missing.append(i)
+
+        if missing and self._conn is not None:
+            found = await asyncio.to_thread(self._read_disk, list({keys[i] for i in missing}))
+            with self._lock:
+                for i in missing:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        self._remember(keys[i], vector)
+                        self.disk_hits += 1
+                        results[i] = vector
+        with self._lock:
+            self.misses += sum(1 for i in missing if results[i] is None)
+        return results
+
+    def _read_disk(self, keys):
+        found = {}
+        with self._disk_lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                    (self.model_id, *chunk),
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def put(self, text, vector):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                if self._conn is not None:
+                    self._pending[key] = vector
+            if self._pending:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="embedding-cache-writer", daemon=True)
+                    self._writer.start()
+                self._wake.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wake.wait()
+            self.flush()
+
+    def _take_pending(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        return batch
+
+    def flush(self):
+        """Writes pending rows: one transaction, then trims the table to disk_capacity (oldest rowids first)."""
+        if self._conn is None:
+            return
+        # Batches are taken under the disk lock, so a flush returns only once every
+        # earlier put is on disk, including one the writer thread was handling
+        with self._disk_lock:
+            batch = self._take_pending()
+            if not batch:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(self.model_id, key, vector.tobytes()) for key, vector in batch.items()],
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.disk_capacity
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                    (excess,),
+                )
+                self.disk_evictions += excess
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_id,
+            "size": len(self._memory),
+            "capacity": self.capacity,
+            "disk_capacity": self.disk_capacity,
+            "pending_writes": len(self._pending),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,90 @@
+import asyncio
+import struct
+
+import httpx
+import numpy as np
+
+# Binary /embed responses: "<II" (rows, dimension) header, then rows * dimension
+# little-endian float32 values. Requested via Accept; JSON stays the default.
+EMBEDDINGS_MEDIA_TYPE = "application/x-embeddings-f32"
+_HEADER = struct.Struct("<II")
+
+
+def pack_embeddings(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    return _HEADER.pack(*vectors.shape) + vectors.tobytes()
+
+
+def unpack_embeddings(body):
+    """(rows, dimension) read-only float32 view of a binary response body; no copy."""
+    rows, dimension = _HEADER.unpack_from(body)
+    if len(body) != _HEADER.size + rows * dimension * 4:
+        raise ValueError(f"Binary embeddings body is {len(body)} bytes, expected {rows}x{dimension} float32")
+    return np.frombuffer(body, dtype="<f4", count=rows * dimension, offset=_HEADER.size).reshape(rows, dimension)
+
+
+class EmbeddingClient:
+    """
+    Non-blocking client for the model service.
+    Connections come from a bounded keep-alive pool and a semaphore caps how many
+    requests are in flight, so a burst of /verify calls queues here instead of
+    exhausting sockets or stalling the event loop.
+    With binary=True it asks for raw float32 responses; a service that only
+    speaks JSON still works, the response's Content-Type decides the decoding.
+    """
+
+    def __init__(self, url, batch_url, timeout=10.0, batch_timeout=60.0,
+                 max_connections=16, max_in_flight=16, binary=True):
+        self.url = url
+        self.batch_url = batch_url
+        self.timeout = timeout
+        self.batch_timeout = batch_timeout
+        self.max_connections = max_connections
+        self.max_in_flight = max_in_flight
+        self.headers = {"Accept": f"{EMBEDDINGS_MEDIA_TYPE}, application/json;q=0.5"} if binary else {}
+        self._client = None
+        self._in_flight = None
+
+    def _get_client(self):
+        # Created lazily so the pool and semaphore belong to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._client
+
+    async def embed(self, text):
+        client = self._get_client()
+        async with self._in_flight:
+            res = await client.post(self.url, json={"text": text})
+        res.raise_for_status()
+        if _is_binary(res):
+            return unpack_embeddings(res.content)[0]
+        return np.array(res.json()["embedding"], dtype=np.float32)
+
+    async def embed_batch(self, texts):
+        client = self._get_client()
+        async with self._in_flight:
+            res = await client.post(self.batch_url, json={"texts": texts}, timeout=self.batch_timeout)
+        res.raise_for_status()
+        if _is_binary(res):
+            return unpack_embeddings(res.content)
+        return np.array(res.json()["embeddings"], dtype=np.float32)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._in_flight = None
+
+
+def _is_binary(res):
+    return res.headers.get("content-type", "").startswith(EMBEDDINGS_MEDIA_TYPE)
@@ -1,12 +1,109 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+import rules
 from rules import check_rules
-from similarity import compute_similarity, check_combination
+from similarity import compute_similarity, compute_similarity_with_embedding, compute_similarity_batch, check_combination, find_conflict
+from database import db, load_existing_titles, embedding_client, embedding_cache, EmbeddingUnavailable
+from config import config
+from phonetic_index import PhoneticIndex
+from approval_queue import ApprovalQueue
+from verdict_cache import VerdictCache
+import metrics
 
 app = FastAPI()
 
+# All approvals go through one writer (group commits, no re-embedding)
+approval_queue = ApprovalQueue(db, max_batch_size=config.APPROVAL_BATCH_MAX, max_wait_ms=config.APPROVAL_MAX_WAIT_MS)
+
+# Repeated titles skip the whole pipeline until the registry or the rules change
+verdict_cache = VerdictCache(config.VERDICT_CACHE_SIZE)
+
+metrics.register_gauges(db, embedding_cache, verdict_cache, approval_queue)
+
+# Readiness checks, filled in by the background warm-up
+readiness = {"index_loaded": False, "model_service": False, "warmup": False}
+WARMUP_TITLE = "warm up query"
+background_tasks = []
+
+async def warm_up():
+    try:
+        await _warm_up_steps()
+    except Exception as e:
+        # /readyz keeps reporting which step never completed
+        print(f"Warm-up failed: {e}")
+
+async def _retry(step, failure):
+    # A failed step is retried with backoff instead of leaving the worker unready for good
+    delay = 1
+    while True:
+        try:
+            return await step()
+        except Exception as e:
+            print(f"{failure} ({e}); retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+async def _merge_and_warm_up():
+    await load_existing_titles()
+    await compute_similarity(WARMUP_TITLE)
+
+async def _warm_up_steps():
+    # 1. Map the FAISS index / metadata and replay the append log (off the event loop)
+    await _retry(lambda: asyncio.to_thread(db.load), "Loading the index failed")
+    readiness["index_loaded"] = True
+
+    # 2. Wait for the model service to answer
+    await _retry(lambda: embedding_client.embed(WARMUP_TITLE), "Model service not reachable yet")
+    readiness["model_service"] = True
+
+    # 3. Merge SQL approvals missing from the index, then run one full similarity pass
+    await _retry(_merge_and_warm_up, "Warm-up query failed")
+    readiness["warmup"] = True
+    print("Warm-up complete, ready to serve.")
+
+    # Periodically fold the append log into faiss_index.bin / title_meta.bin
+    if config.SNAPSHOT_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(db.run_compaction(config.SNAPSHOT_INTERVAL)))
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Returns immediately so the port is bound before anything heavy is loaded
+    approval_queue.start()
+    background_tasks.append(asyncio.create_task(warm_up()))
+
+@app.on_event("shutdown")
+async def close_model_client():
+    await embedding_client.aclose()
+    await asyncio.to_thread(embedding_cache.flush)
+
+@app.on_event("shutdown")
+async def final_snapshot():
+    for task in background_tasks:
+        task.cancel()
+    await approval_queue.stop()
+    if db.loaded:
+        await db.snapshot()
+
+def is_ready():
+    return all(readiness.values())
+
+def _require_ready():
+    if not is_ready():
+        raise HTTPException(status_code=503, detail="Service is warming up")
+
+@app.exception_handler(EmbeddingUnavailable)
+async def embedding_unavailable(request: Request, exc: EmbeddingUnavailable):
+    # Without an embedding the title can be neither checked nor registered
+    return JSONResponse({"detail": f"Model service unavailable, title not verified: {exc}"}, status_code=503)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -15,59 +112,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints whose end-to-end latency is recorded (a fixed set keeps the label small)
+TIMED_ENDPOINTS = {"/verify", "/verify/batch"}
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # Stages timed while serving this request report into `timings` (see metrics.timed)
+    timings = metrics.start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    if request.url.path in TIMED_ENDPOINTS:
+        metrics.request_seconds.labels(request.url.path).observe(elapsed)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed * 1000)
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
 class TitleInput(BaseModel):
     title: str
 
-@app.post("/verify")
-async def verify_title(data: TitleInput):
+class TitleBatchInput(BaseModel):
+    titles: List[str]
 
-    title = data.title
+def _rejection(title, reason, details):
+    return {
+        "title": title,
+        "status": "Rejected",
+        "reason": reason,
+        "similarity_score": 100,
+        "verification_probability": 0,
+        "details": details
+    }
+
+def _precheck(title):
+    """Steps 1-2 (rules, combinations). Returns (details, rejection or None)."""
     all_details = []
 
     # Step 1 — Rules Check (Prefix, Disallowed Words, Periodicity)
-    rule_result = check_rules(title)
+    with metrics.timed("rules"):
+        rule_result = check_rules(title)
     all_details.extend(rule_result.get("details", []))
 
     if rule_result["blocked"]:
         # Rule-based rejection — return immediately (no slow similarity needed)
-        return {
-            "title": title,
-            "status": "Rejected",
-            "reason": rule_result["reason"],
-            "similarity_score": 100,
-            "verification_probability": 0,
-            "details": all_details
-        }
+        return all_details, _rejection(title, rule_result["reason"], all_details)
 
     # Step 2 — Combination Check
-    combo_result = check_combination(title)
+    with metrics.timed("combination"):
+        combo_result = check_combination(title)
     all_details.extend(combo_result.get("details", []))
 
     if combo_result.get("blocked"):
-        return {
-            "title": title,
-            "status": "Rejected",
-            "reason": combo_result["reason"],
-            "similarity_score": 100,
-            "verification_probability": 0,
-            "details": all_details
-        }
+        return all_details, _rejection(title, combo_result["reason"], all_details)
 
-    # Step 3 — Similarity Calculation (Semantic + Phonetic)
-    # Only runs if rules/combination passed — this is the slow step (model service call)
-    similarity_score, similarity_details = compute_similarity(title)
-    all_details.extend(similarity_details)
+    return all_details, None
+
+def _verdict_version():
+    """
+    (registry version, rules version) for the verdict cache. Rule edits are applied
+    first; other workers' approvals are only picked up best-effort (db.sync() starts
+    a background catch-up and does not wait), so the version may briefly lag the
+    shared registry. That is safe: only rejections are cached, and a title rejected
+    against fewer titles stays rejected once more are registered.
+    """
+    db.sync()
+    if config.RULES_RELOAD_INTERVAL >= 0:
+        rules.reload_rules_if_changed()
+    return db.version, rules.rules_version
 
+def _cache_rejection(title, version, verdict):
+    # Approvals register the title (a new version), so only rejections are worth keeping;
+    # nothing is stored if titles or rules changed while the verdict was computed
+    if verdict["status"] == "Rejected" and (db.version, rules.rules_version) == version:
+        verdict_cache.put(title, version, verdict)
+
+def _similarity_verdict(title, similarity_score, all_details, reason=None):
     # Step 4 — Verification Probability Calculation
     probability = max(0, 100 - similarity_score)
     
     # Threshold: 50% similarity means auto-reject
     status = "Approved" if similarity_score < 50 else "Rejected"
-    reason = "Title is unique and follows guidelines" if status == "Approved" else f"Title is too similar to existing titles ({similarity_score:.2f}% match)"
-
-    if status == "Approved":
-        from database import db
-        db.add_title(title)
+    if reason is None:
+        reason = "Title is unique and follows guidelines" if status == "Approved" else f"Title is too similar to existing titles ({similarity_score:.2f}% match)"
 
     return {
         "title": title,
@@ -77,3 +203,153 @@ async def verify_title(data: TitleInput):
         "verification_probability": round(probability, 2),
         "details": all_details
     }
+
+def _batch_conflict(title, emb, approved, batch_phonetic):
+    """Strongest match (>= 50%) against earlier approvals of the same batch, as a detail dict."""
+    best = find_conflict(title, emb, approved, batch_phonetic)
+    if best is None:
+        return None
+    score, other, method = best
+    return {
+        "check_type": "batch_conflict",
+        "description": f"Too similar to '{other}' submitted in the same batch",
+        "matched_title": other,
+        "score": round(score, 2),
+        "method": method
+    }
+
+def _concurrent_rejection(verdict, conflict):
+    """Turns an approval into a rejection when the approval queue found a conflicting concurrent approval."""
+    score, other, method = conflict
+    verdict["details"].insert(0, {
+        "check_type": "concurrent_conflict",
+        "description": f"Too similar to '{other}', approved while this title was being checked",
+        "matched_title": other,
+        "score": round(score, 2),
+        "method": method
+    })
+    return _similarity_verdict(
+        verdict["title"], score, verdict["details"],
+        f"Title is too similar to '{other}' ({score:.2f}% match)"
+    )
+
+@app.post("/verify")
+async def verify_title(data: TitleInput):
+    _require_ready()
+
+    title = data.title
+    version = _verdict_version()
+    cached = verdict_cache.get(title, version)
+    if cached is not None:
+        return cached
+
+    all_details, rejection = _precheck(title)
+    if rejection:
+        _cache_rejection(title, version, rejection)
+        return rejection
+
+    # Step 3 — Similarity Calculation (Semantic + Phonetic)
+    # Only runs if rules/combination passed — this is the slow step (model service call)
+    seen_rows = db.index.ntotal
+    similarity_score, similarity_details, emb = await compute_similarity_with_embedding(title)
+    all_details.extend(similarity_details)
+
+    verdict = _similarity_verdict(title, similarity_score, all_details)
+    _cache_rejection(title, version, verdict)
+    if verdict["status"] == "Approved":
+        # Re-checked against approvals registered since the search started
+        conflict = await approval_queue.submit(title, emb, seen_rows)
+        if conflict is not None:
+            verdict = _concurrent_rejection(verdict, conflict)
+
+    return verdict
+
+@app.post("/verify/batch")
+async def verify_titles(data: TitleBatchInput):
+    """
+    Verifies many titles at once: rules and combinations per title, one embedding
+    call and one multi-row FAISS search for the rest, plus a check of each title
+    against the ones approved earlier in the same batch. Results follow the
+    /verify response shape, in input order.
+    """
+    _require_ready()
+    if len(data.titles) > config.VERIFY_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {config.VERIFY_BATCH_MAX} titles per batch")
+
+    version = _verdict_version()
+    results = [None] * len(data.titles)
+    pending = []  # (position, title, details) for titles that passed steps 1-2
+    for i, title in enumerate(data.titles):
+        # Cached verdicts are rejections, which never affect the other titles of the batch
+        results[i] = verdict_cache.get(title, version)
+        if results[i] is not None:
+            continue
+        all_details, rejection = _precheck(title)
+        if rejection:
+            results[i] = rejection
+            _cache_rejection(title, version, rejection)
+        else:
+            pending.append((i, title, all_details))
+
+    if pending:
+        seen_rows = db.index.ntotal
+        scored, embeddings = await compute_similarity_batch([title for _, title, _ in pending])
+
+        approved = {}  # title -> embedding, accepted so far in this batch
+        positions = {}  # title -> index in results
+        batch_phonetic = PhoneticIndex()
+        for (i, title, all_details), (similarity_score, similarity_details), emb in zip(pending, scored, embeddings):
+            all_details.extend(similarity_details)
+            reason = None
+
+            # Intra-batch conflicts: titles approved earlier in this batch are checked
+            # the way /verify would see them once registered
+            conflict = _batch_conflict(title, emb, approved, batch_phonetic)
+            if conflict:
+                all_details.insert(0, conflict)
+                if conflict["score"] >= max(similarity_score, 50):
+                    similarity_score = conflict["score"]
+                    reason = f"Title is too similar to '{conflict['matched_title']}' submitted in the same batch ({similarity_score:.2f}% match)"
+
+            results[i] = _similarity_verdict(title, similarity_score, all_details, reason)
+            if conflict is None:
+                # A batch conflict depends on this batch, not just the registry
+                _cache_rejection(title, version, results[i])
+            if results[i]["status"] == "Approved":
+                approved[title] = emb
+                positions[title] = i
+                batch_phonetic.add(title)
+
+        if approved:
+            titles = list(approved)
+            conflicts = await approval_queue.submit_many(titles, list(approved.values()), seen_rows)
+            for title, conflict in zip(titles, conflicts):
+                if conflict is not None:
+                    i = positions[title]
+                    results[i] = _concurrent_rejection(results[i], conflict)
+
+    return {"results": results}
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up and serving HTTP
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: index loaded, model service reachable, warm-up query done
+    body = {"ready": is_ready(), **readiness}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    # Prometheus text format: per-stage histograms plus index / cache / queue gauges
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/stats")
+def stats():
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "verdict_cache": verdict_cache.stats(),
+        "approval_queue": approval_queue.stats(),
+    }
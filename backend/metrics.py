@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Gauge, Histogram
+
+# Verification stages, in pipeline order
+STAGES = ("rules", "combination", "embed", "index_search", "phonetic")
+
+# 0.1 ms .. 2.5 s: rule checks are sub-millisecond, a cold model call is not
+_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+stage_seconds = Histogram(
+    "verify_stage_seconds", "Time spent in one stage of title verification", ["stage"], buckets=_BUCKETS
+)
+request_seconds = Histogram(
+    "verify_request_seconds", "End-to-end latency of verification endpoints", ["endpoint"], buckets=_BUCKETS
+)
+
+# Per-request stage totals (ms) for the Server-Timing header; None outside a request
+_request_timings = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(stage):
+    """Observes the block's duration in stage_seconds and adds it to the current request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.labels(stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
+
+
+def start_request():
+    """Starts collecting stage timings for this request; returns the dict the stages fill in."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings, total_ms):
+    entries = [f"{stage};dur={ms:.3f}" for stage, ms in timings.items()]
+    entries.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(entries)
+
+
+def register_gauges(db, embedding_cache, verdict_cache, approval_queue):
+    """Gauges read from the live objects at scrape time."""
+    Gauge("registry_titles", "Titles in the search index").set_function(lambda: db.index.ntotal)
+    Gauge("registry_delta_titles", "Titles added since the last snapshot").set_function(lambda: db.index.delta.ntotal)
+    Gauge("registry_version", "Registry version (bumped on every registration)").set_function(lambda: db.version)
+
+    cache_gauge = Gauge("cache_events", "Cache counters and sizes", ["cache", "counter"])
+    for cache_name, cache in (("embedding", embedding_cache), ("verdict", verdict_cache)):
+        for counter, value in cache.stats().items():
+            if isinstance(value, (int, float)):
+                cache_gauge.labels(cache_name, counter).set_function(
+                    lambda cache=cache, counter=counter: cache.stats()[counter]
+                )
+
+    queue_gauge = Gauge("approval_queue", "Approval queue counters", ["counter"])
+    for counter in approval_queue.stats():
+        queue_gauge.labels(counter).set_function(lambda counter=counter: approval_queue.stats()[counter])
@@ -0,0 +1,91 @@
+import heapq
+
+import jellyfish
+
+
+class PhoneticIndex:
+    """
+    Inverted indexes over every registered title for phonetic candidate lookup:
+    exact Metaphone code buckets, Soundex buckets and character trigrams (an
+    edit-distance proxy). candidates() touches only posting lists, starting with
+    the rarest grams, so it stays well under a millisecond on the full registry.
+    """
+
+    def __init__(self, ngram=3, scan_budget=4000):
+        self.ngram = ngram
+        self.scan_budget = scan_budget
+        self.titles = []
+        self._metaphone = {}
+        self._soundex = {}
+        self._grams = {}
+
+    def _key(self, title):
+        return " ".join(title.lower().split())
+
+    def _ngrams(self, key):
+        padded = f" {key} "
+        return {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+
+    def add(self, title):
+        key = self._key(title)
+        if not key:
+            return
+        idx = len(self.titles)
+        self.titles.append(title)
+        # Metaphone is '' for titles with no Latin consonants (Devanagari, digits-only);
+        # those share no sound, so they are only matched through trigrams
+        code = jellyfish.metaphone(key)
+        if code:
+            self._metaphone.setdefault(code, []).append(idx)
+        soundex = jellyfish.soundex(key)
+        if soundex:
+            self._soundex.setdefault(soundex, []).append(idx)
+        for gram in self._ngrams(key):
+            self._grams.setdefault(gram, []).append(idx)
+
+    def add_many(self, titles):
+        for title in titles:
+            self.add(title)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def candidates(self, title, limit=10):
+        """
+        Titles that sound or are spelled like `title`: every exact Metaphone match,
+        plus the `limit` titles sharing the most trigrams (a shared Soundex code
+        counts as one more). Returns titles, strongest first.
+        """
+        key = self._key(title)
+        if not key or not self.titles:
+            return []
+
+        code = jellyfish.metaphone(key)
+        exact = self._metaphone.get(code, [])[:limit] if code else []
+
+        # Rarest grams first; stop once the posting lists scanned exceed the budget
+        postings = [self._grams[g] for g in self._ngrams(key) if g in self._grams]
+        postings.sort(key=len)
+        soundex = jellyfish.soundex(key)
+        soundex_bucket = self._soundex.get(soundex, []) if soundex else []
+        if len(soundex_bucket) <= self.scan_budget // 4:
+            postings.append(soundex_bucket)
+
+        counts = {}
+        scanned = 0
+        for posting in postings:
+            if scanned and scanned + len(posting) > self.scan_budget:
+                break
+            scanned += len(posting)
+            for idx in posting:
+                counts[idx] = counts.get(idx, 0) + 1
+
+        # Require at least two shared features so single common grams don't qualify
+        best = heapq.nlargest(limit, (item for item in counts.items() if item[1] >= 2), key=lambda item: item[1])
+
+        result, seen = [], set()
+        for idx in exact + [idx for idx, _ in best]:
+            if idx not in seen:
+                seen.add(idx)
+                result.append(self.titles[idx])
+        return result
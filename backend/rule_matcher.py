@@ -0,0 +1,82 @@
+import json
+
+WORD, PREFIX, SUFFIX, PERIODICITY = "disallowed_word", "disallowed_prefix", "disallowed_suffix", "periodicity"
+
+
+class RuleSet:
+    """
+    Compiled form of disallowed_rules.json.
+    Every rule phrase is stored as a token tuple in a hash table, so matching a
+    title costs one lookup per (token position, distinct phrase length) no matter
+    how many rules there are, and all hits come back from a single pass.
+    """
+
+    def __init__(self, disallowed_words=(), disallowed_prefixes=(), periodicity_words=()):
+        self.disallowed_words = list(disallowed_words)
+        self.disallowed_prefixes = list(disallowed_prefixes)
+        self.periodicity_words = list(periodicity_words)
+
+        # phrase tokens -> [(kind, rule position)] for phrases matched anywhere
+        self._anywhere = {}
+        # phrase tokens -> rule position for phrases matched at the start/end
+        self._edges = {}
+        for i, word in enumerate(self.disallowed_words):
+            self._anywhere.setdefault(tuple(word.split()), []).append((WORD, i))
+        for i, word in enumerate(self.periodicity_words):
+            self._anywhere.setdefault(tuple(word.split()), []).append((PERIODICITY, i))
+        for i, prefix in enumerate(self.disallowed_prefixes):
+            self._edges.setdefault(tuple(prefix.split()), i)
+        self._anywhere_lengths = sorted({len(k) for k in self._anywhere if k})
+        self._edge_lengths = sorted({len(k) for k in self._edges if k})
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls(
+            data.get("disallowed_words", []),
+            data.get("disallowed_prefixes", []),
+            data.get("periodicity_words", []),
+        )
+
+    def __len__(self):
+        return len(self.disallowed_words) + len(self.disallowed_prefixes) + len(self.periodicity_words)
+
+    def match(self, t):
+        """
+        Returns (disallowed words, prefix/suffix hits, periodicity words) found in
+        the lowercased title `t`, each in rule-file order. Prefix/suffix hits are
+        (kind, prefix) pairs.
+        """
+        tokens = t.split()
+        n = len(tokens)
+
+        words, periodicity = set(), set()
+        for start in range(n):
+            for length in self._anywhere_lengths:
+                if start + length > n:
+                    break
+                for kind, pos in self._anywhere.get(tuple(tokens[start:start + length]), ()):
+                    (words if kind == WORD else periodicity).add(pos)
+
+        edges = []
+        for length in self._edge_lengths:
+            # A prefix must be followed (a suffix preceded) by at least one more word
+            if length >= n:
+                break
+            pos = self._edges.get(tuple(tokens[:length]))
+            if pos is not None:
+                edges.append((pos, 0, PREFIX))
+            pos = self._edges.get(tuple(tokens[n - length:]))
+            if pos is not None:
+                edges.append((pos, 1, SUFFIX))
+        edges.sort()
+
+        return (
+            [self.disallowed_words[pos] for pos in sorted(words)],
+            [(kind, self.disallowed_prefixes[pos]) for pos, _, kind in edges],
+            [self.periodicity_words[pos] for pos in sorted(periodicity)],
+        )
@@ -1,39 +1,79 @@
-import json
-
-# Load rules dynamically from JSON
 import os
-rules_path = os.path.join(os.path.dirname(__file__), "../data/disallowed_rules.json")
-try:
-    with open(rules_path, "r", encoding="utf-8") as file:
-        rules_data = json.load(file)
-        DISALLOWED_WORDS = rules_data.get("disallowed_words", [])
-        DISALLOWED_PREFIXES = rules_data.get("disallowed_prefixes", [])
-        PERIODICITY_WORDS = rules_data.get("periodicity_words", [])
-except FileNotFoundError:
-    DISALLOWED_WORDS = []
-    DISALLOWED_PREFIXES = []
-    PERIODICITY_WORDS = []
+import threading
+import time
+
+from config import config
+from rule_matcher import RuleSet, PREFIX
+
+# Load rules dynamically from JSON; compiled once and atomically swapped when the file changes
+rules_path = config.RULES_PATH
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
+_rules = RuleSet.from_file(rules_path)
+_rules_signature = _file_signature(rules_path)
+_last_check = time.monotonic()
+_reload_lock = threading.Lock()
+# Bumped on every successful reload so cached verdicts can tell rules changed
+rules_version = 0
+
+def reload_rules_if_changed(force=False):
+    """Recompiles the rules when disallowed_rules.json changed on disk (checked at most every RULES_RELOAD_INTERVAL s)."""
+    global _rules, _rules_signature, _last_check, rules_version
+    now = time.monotonic()
+    if not force and now - _last_check < config.RULES_RELOAD_INTERVAL:
+        return False
+    with _reload_lock:
+        _last_check = now
+        signature = _file_signature(rules_path)
+        if signature == _rules_signature and not force:
+            return False
+        if signature is None:
+            # Mid-replace (or deleted): keep serving the old rules until the file is back
+            print(f"Rules file {rules_path} is missing; keeping the current rules.")
+            return False
+        try:
+            compiled = RuleSet.from_file(rules_path)
+        except (ValueError, OSError, KeyError, TypeError, AttributeError) as e:
+            # Half-written, unreadable or malformed file: keep serving the old rules
+            # and retry on the next check
+            print(f"Failed to reload rules from {rules_path}: {e!r}")
+            return False
+        _rules = compiled
+        _rules_signature = signature
+        rules_version += 1
+        print(f"Reloaded {len(compiled)} rules from {rules_path} (version {rules_version}).")
+        return True
 
 from database import db
 
 def check_rules(title):
+    if config.RULES_RELOAD_INTERVAL >= 0:
+        reload_rules_if_changed()
+    rules = _rules
+
     t = title.lower()
     details = []
+    words, edges, found_periodicity = rules.match(t)
 
     # Rule 1 — Disallowed words
-    for word in DISALLOWED_WORDS:
-        if f" {word} " in f" {t} ":
-            details.append({
-                "check_type": "disallowed_word",
-                "description": f"Contains disallowed word '{word}'",
-                "matched_word": word,
-                "matched_title": None,
-                "score": None
-            })
+    for word in words:
+        details.append({
+            "check_type": "disallowed_word",
+            "description": f"Contains disallowed word '{word}'",
+            "matched_word": word,
+            "matched_title": None,
+            "score": None
+        })
 
     # Rule 2 — Disallowed prefixes/suffixes
-    for prefix in DISALLOWED_PREFIXES:
-        if t.startswith(prefix + " "):
+    for kind, prefix in edges:
+        if kind == PREFIX:
             details.append({
                 "check_type": "disallowed_prefix",
                 "description": f"Title starts with disallowed prefix '{prefix}'",
@@ -41,7 +81,7 @@ def check_rules(title):
                 "matched_title": None,
                 "score": None
             })
-        if t.endswith(" " + prefix):
+        else:
             details.append({
                 "check_type": "disallowed_suffix",
                 "description": f"Title ends with disallowed suffix '{prefix}'",
@@ -51,8 +91,6 @@ def check_rules(title):
             })
 
     # Rule 3 — Periodicity + Existing Title
-    found_periodicity = [p for p in PERIODICITY_WORDS if f" {p} " in f" {t} " or t.startswith(p + " ") or t.endswith(" " + p)]
-    
     if found_periodicity:
         cleaned_t = t
         for p in found_periodicity:
@@ -71,4 +109,4 @@ def check_rules(title):
         # Use the first detail as the primary reason
         return {"blocked": True, "reason": details[0]["description"], "details": details}
 
-    return {"blocked": False, "reason": "", "details": []}
\ No newline at end of file
+    return {"blocked": False, "reason": "", "details": []}
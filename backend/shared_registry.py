@@ -0,0 +1,76 @@
+import fcntl
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+# Control block = magic + snapshot generation + committed length of the append log
+_STATE = struct.Struct("<8sQQ")
+MAGIC = b"XIMSHARE"
+
+
+class SharedRegistry:
+    """
+    Lets several worker processes serve one registry. The vectors and title
+    metadata stay in the memory-mapped snapshot files (a single page-cache copy
+    for all workers) and approvals since the last snapshot stay in the append log;
+    this small mmap'd control file publishes how much of the log is committed and
+    which snapshot generation is current. Its flock makes appends and snapshot
+    installs single-writer (exclusive) while readers catch up under a shared lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a+b")
+        with self.locked(fcntl.LOCK_EX):
+            if os.fstat(self._file.fileno()).st_size < _STATE.size:
+                self._file.truncate(_STATE.size)
+        self._map = mmap.mmap(self._file.fileno(), _STATE.size)
+        self._compaction_file = open(path + ".compact", "a+b")
+
+    def state(self):
+        """(generation, log_end), or None if nothing was published yet."""
+        magic, generation, log_end = _STATE.unpack_from(self._map)
+        if magic != MAGIC:
+            return None
+        return generation, log_end
+
+    def publish(self, generation, log_end):
+        # Caller holds the exclusive lock
+        _STATE.pack_into(self._map, 0, MAGIC, generation, log_end)
+
+    @contextmanager
+    def locked(self, mode):
+        self.acquire(mode)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, mode):
+        # flock belongs to the open file, not the thread: a lock taken in a worker
+        # thread may be released from the event loop. Converting it from another
+        # call in this process (e.g. LOCK_SH while holding LOCK_EX) would replace it
+        fcntl.flock(self._file, mode)
+
+    def release(self):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def compaction(self):
+        """Yields True in the one worker that may compact right now, False elsewhere."""
+        try:
+            fcntl.flock(self._compaction_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(self._compaction_file, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+        self._compaction_file.close()
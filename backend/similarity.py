@@ -2,48 +2,74 @@ import numpy as np
 import jellyfish
 
 from database import db
+from config import config
+from metrics import timed
 
 def phonetic_similarity(a, b):
     # Jaro-Winkler for character similarity + Metaphone check
     jw_score = jellyfish.jaro_winkler_similarity(a.lower(), b.lower()) * 100
     
-    # If the words sound exactly alike phonetically (e.g., Namaskar vs Namascar)
-    is_metaphone_match = jellyfish.metaphone(a) == jellyfish.metaphone(b)
+    # If the words sound exactly alike phonetically (e.g., Namaskar vs Namascar);
+    # an empty code (Devanagari, digits-only) says nothing about the sound
+    code = jellyfish.metaphone(a)
+    is_metaphone_match = bool(code) and code == jellyfish.metaphone(b)
     if is_metaphone_match:
         return max(jw_score, 100.0), "Metaphone exact match"
     return jw_score, "Jaro-Winkler"
 
 def check_combination(new_title):
-    t = new_title.lower()
-    details = []
-    
-    # Use pre-computed O(1) lookup set
-    existing_set = db.get_titles_set()
-    
-    # Space-separated combinations check
-    words = t.split()
-    if len(words) == 2:
-        if words[0] in existing_set and words[1] in existing_set:
-            details.append({
-                "check_type": "combination",
-                "description": f"Title is a combination of two existing titles: '{words[0]}' + '{words[1]}'",
-                "matched_title": f"{words[0]} + {words[1]}",
-                "score": 100,
-                "method": "Exact word match"
-            })
-            return {"blocked": True, "reason": details[0]["description"], "details": details}
+    # Word-break segmentation over the registry trie: any number of existing titles,
+    # multi-word ones included, joined with or without spaces
+    parts = db.find_combination(new_title)
+    if parts is None:
+        return {"blocked": False, "details": []}
 
-    return {"blocked": False, "details": []}
+    quoted = " + ".join(f"'{p}'" for p in parts)
+    count = "two" if len(parts) == 2 else str(len(parts))
+    details = [{
+        "check_type": "combination",
+        "description": f"Title is a combination of {count} existing titles: {quoted}",
+        "matched_title": " + ".join(parts),
+        "parts": parts,
+        "score": 100,
+        "method": "Word-break segmentation"
+    }]
+    return {"blocked": True, "reason": details[0]["description"], "details": details}
 
-def compute_similarity(title):
+async def compute_similarity(title):
+    score, details, _ = await compute_similarity_with_embedding(title)
+    return score, details
+
+async def compute_similarity_with_embedding(title):
+    # 1. Semantic Similarity Search via FAISS (Top 5 matches); the embedding is
+    # returned so an approval can be queued without calling the model again
+    semantic_results, emb = await db.search_similar_with_embedding(title, top_k=5)
+    return (*score_candidates(title, semantic_results), emb)
+
+async def compute_similarity_batch(titles):
+    # Same as compute_similarity for many titles: one embedding call, one FAISS search.
+    # Also returns the embeddings so the caller can check titles against each other.
+    semantic_batch, embeddings = await db.search_similar_batch(titles, top_k=5)
+    return [score_candidates(t, hits) for t, hits in zip(titles, semantic_batch)], embeddings
+
+def score_candidates(title, semantic_results):
+    with timed("phonetic"):
+        return _score_candidates(title, semantic_results)
+
+def _score_candidates(title, semantic_results):
     max_score = 0.0
     details = []
 
-    # 1. Semantic Similarity Search via FAISS (Top 5 matches)
-    semantic_results = db.search_similar(title, top_k=5)
+    # 2. Phonetic candidates from the whole registry (sound-alikes that are semantically distant)
+    candidates = list(semantic_results)
+    seen = {existing.lower() for existing, _ in semantic_results}
+    for existing in db.phonetic_candidates(title, limit=config.PHONETIC_CANDIDATES):
+        if existing.lower() not in seen:
+            seen.add(existing.lower())
+            candidates.append((existing, 0.0))
     
     # Analyze the top matches
-    for existing, sem_score in semantic_results:
+    for existing, sem_score in candidates:
         # Prevent matching against itself
         if existing.lower() == title.lower():
             continue
@@ -58,7 +84,7 @@ def compute_similarity(title):
                 "method": "FAISS cosine similarity"
             })
             
-        # String/Phonetic similarity for the closest semantic hits
+        # String/Phonetic similarity for the closest semantic and phonetic hits
         phon_score, phon_method = phonetic_similarity(title, existing)
         
         # Add phonetic match detail if score is significant (> 60%)
@@ -80,3 +106,21 @@ def compute_similarity(title):
     details.sort(key=lambda d: d.get("score", 0) or 0, reverse=True)
 
     return max_score, details
+
+def find_conflict(title, emb, others, others_phonetic, threshold=50):
+    """
+    Strongest match (>= threshold) between a title and a small set of titles that are
+    not in the index yet: `others` maps title -> normalized embedding and
+    `others_phonetic` is a PhoneticIndex over the same titles.
+    Returns (score, other_title, method) or None.
+    """
+    best = None
+    for other, other_emb in others.items():
+        score = min(100.0, float(emb @ other_emb) * 100)
+        if score >= threshold and (best is None or score > best[0]):
+            best = (score, other, "FAISS cosine similarity")
+    for other in others_phonetic.candidates(title, limit=config.PHONETIC_CANDIDATES):
+        score, method = phonetic_similarity(title, other)
+        if score >= threshold and (best is None or score > best[0]):
+            best = (score, other, method)
+    return best
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Importing the backend modules opens the SQLite registry and caches at their
+# configured paths; point them at a scratch directory instead of data/
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+for name, filename in (
+    ("TITLES_DB_PATH", "titles.db"),
+    ("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+    ("TITLE_LOG_PATH", "title_log.bin"),
+    ("FAISS_INDEX_PATH", "faiss_index.bin"),
+    ("TITLE_META_PATH", "title_meta.bin"),
+):
+    os.environ.setdefault(name, os.path.join(_scratch, filename))
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,16 @@
+from combination_index import CombinationIndex
+
+
+def test_decompose_across_packed_and_added_titles(monkeypatch):
+    monkeypatch.setattr(CombinationIndex, "MIN_BULK", 2)
+    index = CombinationIndex(min_part=4)
+    index.add_many(["Times of India", "Daily News", "दैनिक", "Indian Express"])  # packed
+    index.add("Jagran")  # kept beside the packed part
+    index.add("daily news")  # same key as a packed title: the first one wins
+
+    assert len(index) == 5
+    assert index.decompose("DailyNews Times-of-India") == ["Daily News", "Times of India"]
+    assert index.decompose("दैनिक jagran") == ["दैनिक", "Jagran"]
+    # A single registered title is not a combination, and unknown parts break the cover
+    assert index.decompose("times of india") is None
+    assert index.decompose("daily news today") is None
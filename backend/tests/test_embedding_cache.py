@@ -0,0 +1,25 @@
+import asyncio
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def test_key_keeps_devanagari_vowel_signs():
+    keys = {EmbeddingCache.key(t) for t in ("काम", "कम", "कमी")}
+    assert len(keys) == 3
+    assert EmbeddingCache.key("  Dainik   JAGRAN ") == EmbeddingCache.key("dainik jagran")
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(path, "model", capacity=2, disk_capacity=3)
+    vectors = np.eye(5, dtype=np.float32)
+    cache.put_many([f"title {i}" for i in range(5)], vectors)
+    cache.flush()
+
+    reopened = EmbeddingCache(path, "model", capacity=2, disk_capacity=3)
+    found = asyncio.run(reopened.get_many([f"Title {i}" for i in range(5)]))
+    assert [v is not None for v in found] == [False, False, True, True, True]
+    assert np.array_equal(found[4], vectors[4])
+    assert reopened.stats()["disk_hits"] == 3
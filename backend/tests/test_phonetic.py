@@ -0,0 +1,26 @@
+from phonetic_index import PhoneticIndex
+from similarity import phonetic_similarity
+
+
+def test_unrelated_hindi_titles_are_not_phonetic_matches():
+    index = PhoneticIndex()
+    index.add_many(["अमर उजाला", "1947", "Namaskar Times"])
+
+    assert index.candidates("दैनिक जागरण") == []
+    score, method = phonetic_similarity("दैनिक जागरण", "अमर उजाला")
+    assert method == "Jaro-Winkler"
+    assert score < 60  # below the "phonetically similar" detail threshold
+
+
+def test_digits_only_titles_do_not_share_a_metaphone_bucket():
+    index = PhoneticIndex()
+    index.add("1947")
+    assert index.candidates("2024") == []
+    assert phonetic_similarity("2024", "1947")[1] == "Jaro-Winkler"
+
+
+def test_latin_sound_alikes_still_match():
+    index = PhoneticIndex()
+    index.add_many(["Namaskar", "Dainik Jagran"])
+    assert index.candidates("Namascar")[0] == "Namaskar"
+    assert phonetic_similarity("Namascar", "Namaskar") == (100.0, "Metaphone exact match")
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+import rules
+
+
+@pytest.mark.parametrize("content", ['{"disallowed_words": [', '["police"]', '{"disallowed_words": 5}', None, b"\xff\xfe"])
+def test_bad_rules_file_keeps_previous_rules(tmp_path, monkeypatch, content):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"disallowed_words": ["police"]}))
+    monkeypatch.setattr(rules, "rules_path", str(path))
+    assert rules.reload_rules_if_changed(force=True)
+    version = rules.rules_version
+
+    if content is None:
+        path.unlink()
+    elif isinstance(content, bytes):
+        path.write_bytes(content)
+    else:
+        path.write_text(content)
+    assert not rules.reload_rules_if_changed(force=True)
+    assert rules.rules_version == version
+    assert rules.check_rules("police times")["blocked"]
@@ -0,0 +1,25 @@
+import struct
+import zlib
+
+import numpy as np
+
+from title_log import TitleLog
+
+
+def test_records_from_another_model_are_skipped(tmp_path):
+    path = str(tmp_path / "log.bin")
+    # A record in the format written before model tags existed
+    legacy = "legacy".encode("utf-8") + np.ones(3, dtype="<f4").tobytes()
+    with open(path, "wb") as f:
+        f.write(struct.pack("<III", zlib.crc32(legacy), 6, 3) + legacy)
+
+    TitleLog(path, model="teacher", dimension=4).append(["old"], np.ones((1, 4), dtype=np.float32))
+    TitleLog(path, model="student", dimension=4).append(["same dim"], np.ones((1, 4), dtype=np.float32))
+    log = TitleLog(path, model="student", dimension=3)
+    log.append(["new"], np.full((1, 3), 2, dtype=np.float32))
+
+    titles, vectors = log.replay()
+    assert titles == ["legacy", "new"]
+    assert vectors.shape == (2, 3) and vectors[1, 0] == 2
+    assert log.records == 4
+    assert log.read(0, log.size())[0] == ["legacy", "new"]
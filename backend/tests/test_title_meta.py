@@ -0,0 +1,23 @@
+import os
+
+from title_meta import TitleMeta, TitleMetaWriter, write_title_meta
+
+
+def test_chunked_writer_matches_one_shot(tmp_path, monkeypatch):
+    columns = {
+        "original_english": [f"TITLE {i}" for i in range(10)],
+        "original_hindi": ["दैनिक जागरण", "", "1947", "nan"] * 2 + ["x", "y"],
+        "state": ["UP", "MH", "UP", "DL", "", "MH", "UP", "UP", "TN", "DL"],
+        "periodicity": ["D", "W"] * 5,
+    }
+    write_title_meta(str(tmp_path / "one.bin"), columns)
+
+    monkeypatch.setattr(TitleMetaWriter, "BLOCK_ROWS", 3)
+    with TitleMetaWriter(str(tmp_path / "chunked.bin"), list(columns)) as writer:
+        for start in range(0, 10, 4):
+            writer.append({name: values[start:start + 4] for name, values in columns.items()})
+
+    assert (tmp_path / "one.bin").read_bytes() == (tmp_path / "chunked.bin").read_bytes()
+    meta = TitleMeta(str(tmp_path / "chunked.bin"))
+    assert meta[6] == {"idx": 6, "original_english": "TITLE 6", "original_hindi": "1947", "state": "UP", "periodicity": "D"}
+    assert sorted(os.listdir(tmp_path)) == ["chunked.bin", "one.bin"]
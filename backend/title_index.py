@@ -0,0 +1,117 @@
+import os
+
+import faiss
+import numpy as np
+
+# Map the index file instead of reading it (flat codes, HNSW storage, IVF lists);
+# older FAISS builds only know IO_FLAG_MMAP, which covers IVF lists
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+
+
+def read_index_mmap(path):
+    """Returns (index, mapped). Falls back to a plain read for types that cannot be mapped."""
+    try:
+        return faiss.read_index(path, MMAP_FLAGS), True
+    except RuntimeError:
+        return faiss.read_index(path), False
+
+
+def read_rerank_vectors(path, ntotal):
+    """
+    Memory-maps the full-precision vectors written next to a compressed index
+    (6_build_faiss.py --encoding), or returns None. Rows are append-only, so a file
+    longer than the index (crash between the two snapshot renames) is still valid.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    vectors = np.load(path, mmap_mode="r")
+    if len(vectors) < ntotal:
+        print(f"Warning: {path} has {len(vectors)} vectors but the index has {ntotal}; re-ranking disabled.")
+        return None
+    return vectors[:ntotal]
+
+
+def write_rerank_vectors(path, base_vectors, delta_vectors, chunk_size=65536):
+    """Writes base_vectors (memory-mapped) followed by delta_vectors to a new .npy at `path`."""
+    shape = (len(base_vectors) + len(delta_vectors), base_vectors.shape[1])
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+    n = len(base_vectors)
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        out[start:end] = base_vectors[start:end]
+    out[n:] = delta_vectors
+    out.flush()
+
+
+class LayeredIndex:
+    """
+    A read-only base index (usually memory-mapped, so startup does not copy it and
+    worker processes share its pages) plus an in-memory IndexFlatIP holding the
+    vectors added since. Searches query both and merge by score; ids in the delta
+    continue after the base's.
+
+    If the base stores compressed codes (SQ8/PQ/fp16), `vectors` holds its rows at
+    full precision (memory-mapped): the base returns top_k * rerank_factor
+    candidates, which are re-scored exactly so reported similarities stay accurate.
+    """
+
+    def __init__(self, base, vectors=None, rerank_factor=4):
+        self.base = base
+        self.d = base.d
+        self.delta = faiss.IndexFlatIP(self.d)
+        self.vectors = vectors
+        self.rerank_factor = max(1, rerank_factor)
+
+    @property
+    def ntotal(self):
+        return self.base.ntotal + self.delta.ntotal
+
+    def add(self, x):
+        self.delta.add(x)
+
+    def search(self, x, k):
+        distances, indices = self._search_base(x, k)
+        if self.delta.ntotal == 0:
+            return distances, indices
+
+        delta_distances, delta_indices = self.delta.search(x, k)
+        delta_indices = np.where(delta_indices >= 0, delta_indices + self.base.ntotal, -1)
+        all_distances = np.hstack([distances, delta_distances])
+        all_indices = np.hstack([indices, delta_indices])
+        order = np.argsort(-all_distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(all_distances, order, 1), np.take_along_axis(all_indices, order, 1)
+
+    def _search_base(self, x, k):
+        if self.vectors is None:
+            return self.base.search(x, k)
+        _, candidates = self.base.search(x, k * self.rerank_factor)
+        # Exact inner products for the candidates (-1 = fewer than asked for)
+        valid = candidates >= 0
+        rows = self.vectors[np.where(valid, candidates, 0).ravel()].reshape(*candidates.shape, self.d)
+        scores = np.where(valid, np.einsum("qkd,qd->qk", rows, x), -np.inf).astype(np.float32)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(scores, order, 1), np.take_along_axis(candidates, order, 1)
+
+    def delta_vectors(self):
+        if self.delta.ntotal == 0:
+            return np.zeros((0, self.d), dtype=np.float32)
+        return self.delta.reconstruct_n(0, self.delta.ntotal)
+
+    def rebase(self, base, consumed, vectors=None):
+        """Swaps in a new base that already contains the first `consumed` delta vectors."""
+        remaining = self.delta_vectors()[consumed:]
+        self.base = base
+        self.vectors = vectors
+        self.delta = faiss.IndexFlatIP(self.d)
+        if len(remaining):
+            self.delta.add(remaining)
+
+
+def merged_index_bytes(base, delta_vectors):
+    """Serialized copy of `base` with `delta_vectors` added (the base itself is not modified)."""
+    if len(delta_vectors) == 0:
+        return faiss.serialize_index(base)
+    # Round-trip through bytes to get an owned, writable copy of a mapped index
+    merged = faiss.deserialize_index(faiss.serialize_index(base))
+    merged.add(delta_vectors)
+    return faiss.serialize_index(merged)
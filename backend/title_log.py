@@ -0,0 +1,159 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Record = header (crc32 of payload, title byte length, vector dim) + payload, where
+# payload = [model tag] + utf-8 title + float32 vector. The high bit of the title
+# length marks the model tag (crc32 of the model name); older records have none.
+_HEADER = struct.Struct("<III")
+_TAG = struct.Struct("<I")
+_TAGGED = 1 << 31
+
+
+def model_tag(model):
+    return zlib.crc32(model.encode("utf-8"))
+
+
+class TitleLog:
+    """
+    Append-only on-disk log of approved titles and their normalized vectors.
+    Everything added since the last index snapshot lives here, so a restart can
+    replay it instead of re-embedding. A torn record at the tail (crash mid-write)
+    is detected by length/CRC and cut off on replay.
+
+    Records carry the model that embedded them. Reads return only vectors from
+    `model` with `dimension` components (untagged records: the dimension alone);
+    the others are skipped, since their titles are re-embedded from SQLite.
+    """
+
+    def __init__(self, path, fsync=True, model="", dimension=None):
+        self.path = path
+        self.fsync = fsync
+        self.tag = model_tag(model)
+        self.dimension = dimension
+        self.records = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "ab")
+
+    def append(self, titles, vectors):
+        buf = bytearray()
+        for title, vector in zip(titles, vectors):
+            title_bytes = title.encode("utf-8")
+            vector = np.ascontiguousarray(vector, dtype="<f4").ravel()
+            payload = _TAG.pack(self.tag) + title_bytes + vector.tobytes()
+            buf += _HEADER.pack(zlib.crc32(payload), len(title_bytes) | _TAGGED, vector.size)
+            buf += payload
+        self._file.write(buf)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += len(titles)
+
+    def size(self):
+        # Size on disk, so appends made by other processes are counted too
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def replay(self):
+        """Returns (titles, vectors) for every intact record, truncating any torn tail."""
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        titles, vectors, offset = self._parse(data)
+        if offset < len(data):
+            print(f"Warning: discarding {len(data) - offset} bytes of torn records from {self.path}")
+            self.truncate(offset)
+
+        # Every record on disk, skipped ones included, so the next snapshot drops them too
+        self.records = len(titles)
+        titles, vectors = self._current(titles, vectors)
+        return titles, self._stack(vectors)
+
+    def read(self, start, end):
+        """Returns (titles, vectors) for the records between two byte offsets, without truncating."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        titles, vectors, _ = self._parse(data)
+        titles, vectors = self._current(titles, vectors)
+        return titles, self._stack(vectors)
+
+    def truncate(self, offset):
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def reopen(self):
+        # The path now names a different file (another process compacted the log)
+        self._file.close()
+        self._file = open(self.path, "ab")
+
+    @staticmethod
+    def _record_size(title_len, dim):
+        tag_size = _TAG.size if title_len & _TAGGED else 0
+        return _HEADER.size + tag_size + (title_len & ~_TAGGED) + 4 * dim
+
+    @classmethod
+    def _parse(cls, data):
+        """(titles, [(model tag or None, vector)], end of the last intact record)."""
+        titles, vectors = [], []
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            crc, title_len, dim = _HEADER.unpack_from(data, offset)
+            end = offset + cls._record_size(title_len, dim)
+            payload = data[offset + _HEADER.size:end]
+            if end > len(data) or zlib.crc32(payload) != crc:
+                break
+            tag = None
+            if title_len & _TAGGED:
+                (tag,), payload, title_len = _TAG.unpack_from(payload), payload[_TAG.size:], title_len & ~_TAGGED
+            titles.append(payload[:title_len].decode("utf-8"))
+            vectors.append((tag, np.frombuffer(payload, dtype="<f4", offset=title_len, count=dim)))
+            offset = end
+        return titles, vectors, offset
+
+    def _current(self, titles, vectors):
+        # Drops records embedded by another model (e.g. before switching to the distilled student)
+        keep = [
+            i for i, (tag, vector) in enumerate(vectors)
+            if tag in (None, self.tag) and (self.dimension is None or vector.size == self.dimension)
+        ]
+        if len(keep) < len(titles):
+            print(f"Warning: skipping {len(titles) - len(keep)} records of {self.path} from another model or dimension")
+        return [titles[i] for i in keep], [vectors[i][1] for i in keep]
+
+    @staticmethod
+    def _stack(vectors):
+        if not vectors:
+            return None
+        return np.vstack(vectors).astype(np.float32)
+
+    def discard_before(self, offset):
+        """Drops records written before byte `offset` (they are now in a snapshot)."""
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+        self.records = self._count(tail)
+
+    @staticmethod
+    def _count(data):
+        count, offset = 0, 0
+        while offset + _HEADER.size <= len(data):
+            _, title_len, dim = _HEADER.unpack_from(data, offset)
+            offset += TitleLog._record_size(title_len, dim)
+            count += 1
+        return count
+
+    def close(self):
+        self._file.close()
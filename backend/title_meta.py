@@ -0,0 +1,289 @@
+"""
+Compact, memory-mapped title metadata (replaces title_ids.json).
+
+Layout: magic, u32 format version, u32 header length, JSON header, then one
+8-byte aligned section per column.
+  string columns: uint32 (uint64 if > 4 GB) offsets[rows + 1], then the utf-8 bytes
+  code columns:   uint8/uint16 codes[rows]; the header holds the code -> value table
+Readers map the file and decode a field only when a row is asked for.
+
+    python title_meta.py title_ids.json title_meta.bin   # convert a legacy id file
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+MAGIC = b"XIMTMETA"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+
+# Column order and kind for the PRGI registry export
+STRING_COLUMNS = ("original_english", "original_hindi")
+CODE_COLUMNS = ("state", "periodicity")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_title_meta(path, columns):
+    """
+    Writes `columns` ({name: list of str}, all the same length) to `path`.
+    Names in CODE_COLUMNS are dictionary-encoded, everything else is stored as strings.
+    """
+    with TitleMetaWriter(path, list(columns)) as writer:
+        writer.append(columns)
+
+
+class TitleMetaWriter:
+    """
+    Builds a title metadata file from rows appended in chunks. Each column is
+    spooled to a temporary file next to `path`, so memory holds one chunk (plus
+    the code tables) at a time. Used as a context manager, the file is published
+    on a clean exit and the spool is dropped on an exception.
+    """
+
+    # Rows per block when the spooled columns are copied into the final file
+    BLOCK_ROWS = 1 << 20
+
+    def __init__(self, path, names):
+        self.path = path
+        self.names = list(names)
+        self.rows = 0
+        self._dir = tempfile.mkdtemp(prefix=".title_meta.", dir=os.path.dirname(os.path.abspath(path)))
+        self._lookups = {name: {} for name in self.names if name in CODE_COLUMNS}
+        self._data_bytes = {name: 0 for name in self.names if name not in CODE_COLUMNS}
+        self._spools = {}
+        for name in self.names:
+            parts = ("codes",) if name in CODE_COLUMNS else ("lengths", "data")
+            for part in parts:
+                self._spools[name, part] = open(os.path.join(self._dir, f"{len(self._spools)}.{part}"), "w+b")
+
+    def append(self, columns):
+        """Appends one chunk: {name: list of str} with every column of the writer."""
+        if set(columns) != set(self.names):
+            raise ValueError(f"Expected columns {self.names}, got {list(columns)}")
+        rows = len(columns[self.names[0]]) if self.names else 0
+        for name in self.names:
+            values = ["" if v is None else str(v) for v in columns[name]]
+            if len(values) != rows:
+                raise ValueError(f"Column '{name}' has {len(values)} rows, expected {rows}")
+            if name in CODE_COLUMNS:
+                # Codes in first-seen order for now; close() renumbers them by sorted value
+                lookup = self._lookups[name]
+                codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.uint32, count=rows)
+                codes.tofile(self._spools[name, "codes"])
+            else:
+                encoded = [v.encode("utf-8") for v in values]
+                np.fromiter(map(len, encoded), dtype=np.uint64, count=rows).tofile(self._spools[name, "lengths"])
+                self._spools[name, "data"].write(b"".join(encoded))
+                self._data_bytes[name] += sum(len(b) for b in encoded)
+        self.rows += rows
+
+    def _spooled_blocks(self, name, part, dtype):
+        spool = self._spools[name, part]
+        spool.flush()
+        spool.seek(0)
+        while True:
+            block = np.fromfile(spool, dtype=dtype, count=self.BLOCK_ROWS)
+            if not len(block):
+                return
+            yield block
+
+    def close(self):
+        """Assembles and atomically publishes the file, then removes the spool."""
+        rows = self.rows
+        header = {"rows": rows, "columns": {}}
+        sizes = {}
+        for name in self.names:
+            if name in CODE_COLUMNS:
+                table = sorted(self._lookups[name])
+                dtype = np.uint8 if len(table) <= 256 else np.uint16
+                header["columns"][name] = {"kind": "code", "dtype": np.dtype(dtype).str, "values": table}
+                sizes[name] = (rows * np.dtype(dtype).itemsize,)
+            else:
+                offsets_dtype = "<u4" if self._data_bytes[name] < 2 ** 32 else "<u8"
+                header["columns"][name] = {"kind": "string", "offsets_dtype": offsets_dtype}
+                sizes[name] = ((rows + 1) * np.dtype(offsets_dtype).itemsize, self._data_bytes[name])
+
+        # Section offsets depend on the header length, which contains them: reserve
+        # space, lay out, and grow the reservation until the header fits
+        reserved = 0
+        while True:
+            pos = _align(_PREAMBLE.size + reserved)
+            for name in self.names:
+                meta = header["columns"][name]
+                if meta["kind"] == "code":
+                    meta["offset"] = pos
+                    pos = _align(pos + sizes[name][0])
+                else:
+                    meta["offsets"] = pos
+                    meta["data"] = pos + sizes[name][0]
+                    pos = _align(pos + sum(sizes[name]))
+            header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            if len(header_bytes) <= reserved:
+                header_bytes = header_bytes.ljust(reserved)
+                break
+            reserved = len(header_bytes) + 16
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for name in self.names:
+                meta = header["columns"][name]
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                if meta["kind"] == "code":
+                    lookup = self._lookups[name]
+                    remap = np.empty(len(lookup), dtype=meta["dtype"])
+                    remap[[lookup[v] for v in meta["values"]]] = np.arange(len(lookup))
+                    for block in self._spooled_blocks(name, "codes", np.uint32):
+                        f.write(remap[block].tobytes())
+                else:
+                    # Offsets are the running sum of the spooled lengths
+                    f.write(np.zeros(1, dtype=meta["offsets_dtype"]).tobytes())
+                    total = 0
+                    for block in self._spooled_blocks(name, "lengths", np.uint64):
+                        offsets = np.cumsum(block) + np.uint64(total)
+                        total = int(offsets[-1])
+                        f.write(offsets.astype(meta["offsets_dtype"]).tobytes())
+                    data = self._spools[name, "data"]
+                    data.flush()
+                    data.seek(0)
+                    shutil.copyfileobj(data, f, 1 << 20)
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.discard()
+
+    def discard(self):
+        """Drops the spooled rows without writing anything."""
+        for spool in self._spools.values():
+            spool.close()
+        self._spools = {}
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class TitleColumn:
+    """Lazy, read-only sequence view of one column of a TitleMeta file."""
+
+    def __init__(self, meta, name):
+        self._get = meta._field_reader(name)
+        self._rows = len(meta)
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._get(i) for i in range(*row.indices(self._rows))]
+        if row < 0:
+            row += self._rows
+        if not 0 <= row < self._rows:
+            raise IndexError(row)
+        return self._get(row)
+
+    def __iter__(self):
+        for i in range(self._rows):
+            yield self._get(i)
+
+
+class TitleMeta:
+    """Memory-mapped reader; `meta[i]` returns the same dict a title_ids.json record had."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a title metadata file (v{VERSION})")
+        header = json.loads(bytes(self._mm[_PREAMBLE.size:_PREAMBLE.size + header_len]))
+        self.rows = header["rows"]
+        self.columns = header["columns"]
+
+    def __len__(self):
+        return self.rows
+
+    def _field_reader(self, name):
+        meta = self.columns[name]
+        if meta["kind"] == "code":
+            codes = np.frombuffer(self._mm, dtype=meta["dtype"], count=self.rows, offset=meta["offset"])
+            values = meta["values"]
+            return lambda row: values[codes[row]]
+
+        offsets = np.frombuffer(self._mm, dtype=meta["offsets_dtype"], count=self.rows + 1, offset=meta["offsets"])
+        data, mm = meta["data"], self._mm
+        return lambda row: mm[data + int(offsets[row]):data + int(offsets[row + 1])].decode("utf-8")
+
+    def column(self, name):
+        return TitleColumn(self, name)
+
+    def get(self, row, name):
+        return self._field_reader(name)(row)
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        record = {"idx": row}
+        for name in self.columns:
+            record[name] = self.get(row, name)
+        return record
+
+
+class AppendableColumn:
+    """A TitleColumn (or list) plus in-memory rows appended after it was written."""
+
+    def __init__(self, base=()):
+        self.base = base
+        self.extra = []
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if row < len(self.base):
+            return self.base[row]
+        return self.extra[row - len(self.base)]
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.extra
+
+    def append(self, value):
+        self.extra.append(value)
+
+    def extend(self, values):
+        self.extra.extend(values)
+
+
+def convert_json(json_path, meta_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    columns = {name: [r.get(name, "") for r in records] for name in STRING_COLUMNS + CODE_COLUMNS}
+    write_title_meta(meta_path, columns)
+    print(f"Wrote {len(records)} records to {meta_path} ({os.path.getsize(meta_path)} bytes)")
+
+
+if __name__ == "__main__":
+    convert_json(sys.argv[1], sys.argv[2])
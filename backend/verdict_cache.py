@@ -0,0 +1,66 @@
+import copy
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """
+    Bounded LRU of /verify verdicts keyed on the case-folded title (every check
+    ignores case). Each entry remembers the version it was computed under, i.e.
+    (registry version, rules version); a lookup under any other version is a
+    miss and drops the entry, so a verdict never outlives a registration or a
+    rules reload.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(title):
+        return title.lower()
+
+    def get(self, title, version):
+        key = self.key(title)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] != version:
+            del self._entries[key]
+            self.stale += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers may add details to the verdict they get; echo the title as submitted
+        verdict = copy.deepcopy(entry[1])
+        verdict["title"] = title
+        return verdict
+
+    def put(self, title, version, verdict):
+        if self.capacity <= 0:
+            return
+        key = self.key(title)
+        self._entries[key] = (version, copy.deepcopy(verdict))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1 @@
+"""Benchmarks; run the scripts from the repository root (python -m benchmark.<name>)."""
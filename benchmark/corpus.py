@@ -0,0 +1,173 @@
+"""
+Synthetic title corpus and registry for benchmarks.
+
+Titles are drawn from the word distribution of combined_preprocessed.csv (1-4
+words, the real titles' length mix, occasional periodicity word), so any size
+from the 12k real rows to millions keeps realistic vocabulary and collisions.
+The registry is what the backend loads: faiss_index.bin + title_meta.bin with
+the fake model service's vectors, so searches behave as if that model built it.
+
+    python -m benchmark.corpus --titles 1000000 --output bench-registry/
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from benchmark.fake_model_service import FakeEncoder
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from title_meta import write_title_meta  # noqa: E402
+
+CORPUS_CSV = os.path.join(ROOT, "data_pipeline", "combined_preprocessed.csv")
+PERIODICITY = ["daily", "weekly", "monthly", "fortnightly"]
+STATES = ["DELHI", "MAHARASHTRA", "UTTAR PRADESH", "KARNATAKA", "TAMIL NADU", "WEST BENGAL", "GUJARAT", "BIHAR"]
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def load_real_titles(path=CORPUS_CSV):
+    with open(path, "r", encoding="utf-8") as f:
+        return [row["Title Name (English)"] for row in csv.DictReader(f) if row.get("Title Name (English)")]
+
+
+class TitleGenerator:
+    """Samples new titles from the word and length distribution of the real ones."""
+
+    def __init__(self, real_titles, seed=0):
+        tokenized = [_WORD_RE.findall(t.lower()) for t in real_titles]
+        tokenized = [words for words in tokenized if words]
+        counts = Counter(w for words in tokenized for w in words if w not in PERIODICITY)
+        self.words = np.array(sorted(counts))
+        weights = np.array([counts[w] for w in self.words], dtype=np.float64)
+        self.word_p = weights / weights.sum()
+        lengths = Counter(min(len(words), 4) for words in tokenized)
+        self.lengths = np.array(sorted(lengths))
+        self.length_p = np.array([lengths[n] for n in self.lengths], dtype=np.float64)
+        self.length_p /= self.length_p.sum()
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, count):
+        """`count` distinct upper-case titles (like the registry's)."""
+        titles = []
+        seen = set()
+        while len(titles) < count:
+            need = count - len(titles)
+            # Sampled in bulk: word indices for the longest length, trimmed per title
+            lengths = self.rng.choice(self.lengths, size=need, p=self.length_p)
+            picks = self.rng.choice(len(self.words), size=(need, 4), p=self.word_p)
+            periodic = self.rng.random(need) < 0.08
+            periods = self.rng.choice(PERIODICITY, size=need)
+            for n, row, add_period, period in zip(lengths, picks, periodic, periods):
+                words = list(self.words[row[:n]])
+                if add_period:
+                    words.append(period)
+                title = " ".join(words).upper()
+                if title not in seen:
+                    seen.add(title)
+                    titles.append(title)
+        return titles
+
+
+def generate_corpus(size, seed=0, real_titles=None):
+    """The real titles first (deduplicated), topped up with synthetic ones to `size`."""
+    real_titles = real_titles if real_titles is not None else load_real_titles()
+    titles = list(dict.fromkeys(t.strip() for t in real_titles if t.strip()))[:size]
+    existing = {t.upper() for t in titles}
+    generator = TitleGenerator(real_titles, seed)
+    while len(titles) < size:
+        # Overshoot a little: some samples collide with real titles or earlier batches
+        for title in generator.sample(int((size - len(titles)) * 1.05) + 1):
+            if title not in existing and len(titles) < size:
+                existing.add(title)
+                titles.append(title)
+    return titles
+
+
+def make_queries(titles, count, seed=1, real_titles=None):
+    """
+    A /verify workload: 25% registered titles (exact or re-cased), 45% near
+    variants (a word added, dropped or swapped, a typo), 30% new synthetic titles.
+    Every query is distinct, so the verdict cache does not hide the pipeline cost.
+    """
+    rng = np.random.default_rng(seed)
+    generator = TitleGenerator(real_titles if real_titles is not None else titles, seed)
+    fresh = iter(generator.sample(count))
+    queries, seen = [], set()
+    while len(queries) < count:
+        kind = rng.random()
+        base = titles[rng.integers(len(titles))]
+        words = base.split()
+        if kind < 0.25:
+            query = base if rng.random() < 0.5 else base.title()
+        elif kind < 0.70:
+            op = rng.integers(4)
+            if op == 0:
+                words.insert(rng.integers(len(words) + 1), str(generator.words[rng.integers(len(generator.words))]).upper())
+            elif op == 1 and len(words) > 1:
+                words.pop(rng.integers(len(words)))
+            elif op == 2:
+                words[rng.integers(len(words))] = str(generator.words[rng.integers(len(generator.words))]).upper()
+            else:
+                w = rng.integers(len(words))
+                if len(words[w]) > 2:
+                    c = rng.integers(len(words[w]))
+                    words[w] = words[w][:c] + chr(ord("A") + rng.integers(26)) + words[w][c + 1:]
+            query = " ".join(words)
+        else:
+            query = next(fresh, base + " " + str(rng.integers(1000)))
+        if query.lower() not in seen:
+            seen.add(query.lower())
+            queries.append(query)
+    return queries
+
+
+def build_registry(titles, output_dir, dimension=384, chunk_size=50000):
+    """Writes faiss_index.bin + title_meta.bin for `titles` using the fake encoder's vectors."""
+    import faiss
+
+    os.makedirs(output_dir, exist_ok=True)
+    encoder = FakeEncoder(dimension)
+    index = faiss.IndexFlatIP(dimension)
+    for start in range(0, len(titles), chunk_size):
+        vectors = encoder.encode(titles[start:start + chunk_size])
+        faiss.normalize_L2(vectors)
+        index.add(vectors)
+    faiss.write_index(index, os.path.join(output_dir, "faiss_index.bin"))
+
+    rng = np.random.default_rng(0)
+    write_title_meta(os.path.join(output_dir, "title_meta.bin"), {
+        "original_english": titles,
+        "original_hindi": [""] * len(titles),
+        "state": [STATES[i] for i in rng.integers(len(STATES), size=len(titles))],
+        "periodicity": [PERIODICITY[i].capitalize() for i in rng.integers(len(PERIODICITY), size=len(titles))],
+    })
+    return output_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic title registry for benchmarks")
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench-registry")
+    parser.add_argument("--csv", default=None, help="also write the titles to this CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    corpus = generate_corpus(args.titles, args.seed)
+    print(f"Generated {len(corpus)} titles in {time.perf_counter() - start:.1f}s")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Title Name (English)"])
+            writer.writerows([t] for t in corpus)
+    start = time.perf_counter()
+    build_registry(corpus, args.output, args.dim)
+    print(f"Wrote registry to {args.output}/ in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,124 @@
+"""
+Deterministic stand-in for model-service: same /embed and /embed_batch API,
+no model. A title's vector is the sum of hash-seeded vectors of its words plus a
+smaller hash-seeded vector of the whole title, so titles sharing words are
+semantically close (as with the real model) and every run gets identical vectors.
+
+    python -m benchmark.fake_model_service [--port 8001] [--dim 384] [--latency-ms 0]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sys
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from embedding_client import EMBEDDINGS_MEDIA_TYPE, pack_embeddings  # noqa: E402
+
+DIMENSION = int(os.getenv("FAKE_EMBED_DIM", 384))
+# Simulated per-call model latency (applied once per request, batch or not)
+LATENCY_MS = float(os.getenv("FAKE_EMBED_LATENCY_MS", 0))
+# Weight of the whole-title component relative to each word's
+TITLE_WEIGHT = 0.35
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _seeded_vector(token, dimension):
+    seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+
+
+class FakeEncoder:
+    """Bag-of-hashed-words encoder; word vectors are memoized (the vocabulary is small)."""
+
+    def __init__(self, dimension=DIMENSION):
+        self.dimension = dimension
+        self._words = {}
+
+    def _word(self, word):
+        vector = self._words.get(word)
+        if vector is None:
+            vector = self._words[word] = _seeded_vector("w:" + word, self.dimension)
+        return vector
+
+    def encode_one(self, text):
+        text = text.lower()
+        vector = TITLE_WEIGHT * _seeded_vector("t:" + " ".join(text.split()), self.dimension)
+        for word in _WORD_RE.findall(text):
+            vector += self._word(word)
+        return vector
+
+    def encode(self, texts):
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack([self.encode_one(t) for t in texts])
+
+
+app = FastAPI()
+encoder = FakeEncoder()
+calls = {"embed": 0, "embed_batch": 0, "texts": 0}
+
+
+class InputText(BaseModel):
+    text: str
+
+
+class InputTexts(BaseModel):
+    texts: List[str]
+
+
+def _respond(request, key, vectors):
+    # Same content negotiation as model-service: raw float32 if asked for, else JSON
+    if EMBEDDINGS_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(pack_embeddings(vectors), media_type=EMBEDDINGS_MEDIA_TYPE)
+    return {key: vectors.tolist()}
+
+
+async def _simulate_model():
+    if LATENCY_MS > 0:
+        await asyncio.sleep(LATENCY_MS / 1000.0)
+
+
+@app.post("/embed")
+async def embed(data: InputText, request: Request):
+    await _simulate_model()
+    calls["embed"] += 1
+    calls["texts"] += 1
+    return _respond(request, "embedding", encoder.encode_one(data.text))
+
+
+@app.post("/embed_batch")
+async def embed_batch(data: InputTexts, request: Request):
+    await _simulate_model()
+    calls["embed_batch"] += 1
+    calls["texts"] += len(data.texts)
+    return _respond(request, "embeddings", encoder.encode(data.texts))
+
+
+@app.get("/stats")
+def stats():
+    return {"fake": True, "dimension": encoder.dimension, "latency_ms": LATENCY_MS, "calls": calls}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic fake embedding service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dim", type=int, default=DIMENSION)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    args = parser.parse_args()
+
+    encoder = FakeEncoder(args.dim)
+    LATENCY_MS = args.latency_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,308 @@
+"""
+End-to-end /verify benchmark against a synthetic registry, with no real model.
+
+Starts the fake model service and a backend (each in its own process) on a
+scratch copy of the registry, then measures:
+  - cold start: seconds until /healthz answers and until /readyz reports ready
+  - RSS of the backend once ready and after the load
+  - /verify latency percentiles and throughput at each concurrency level
+Results are written as JSON so two commits can be compared:
+
+    python -m benchmark.load_test --titles 100000 --concurrency 1 8 32 --output-json after.json
+    python -m benchmark.load_test --titles 100000 --compare before.json --output-json after.json
+
+--backend-url skips the process management and loads an already running server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+from benchmark.corpus import ROOT, build_registry, generate_corpus, load_real_titles, make_queries
+
+BACKEND_DIR = os.path.join(ROOT, "backend")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    # Linux only; None elsewhere
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def wait_for(url, timeout, expect_ok=True):
+    """Polls `url` until it answers (200 if expect_ok); returns the seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            response = httpx.get(url, timeout=2)
+            if not expect_ok or response.status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+class Services:
+    """Fake model service + backend on free ports, all state in a scratch directory."""
+
+    def __init__(self, registry_dir, workdir, dimension, embed_latency_ms, workers=1):
+        self.registry_dir = registry_dir
+        self.workdir = workdir
+        self.dimension = dimension
+        self.embed_latency_ms = embed_latency_ms
+        self.workers = workers
+        self.processes = []
+
+    def _spawn(self, args, env, cwd, log_name):
+        log = open(os.path.join(self.workdir, log_name), "w")
+        process = subprocess.Popen(args, env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    def start_model_service(self):
+        port = free_port()
+        env = {**os.environ, "PYTHONPATH": ROOT}
+        self._spawn(
+            [sys.executable, "-m", "benchmark.fake_model_service", "--port", str(port),
+             "--dim", str(self.dimension), "--latency-ms", str(self.embed_latency_ms)],
+            env, ROOT, "model_service.log",
+        )
+        self.model_url = f"http://127.0.0.1:{port}"
+        wait_for(self.model_url + "/stats", timeout=30)
+
+    def start_backend(self):
+        """Starts the backend on a fresh copy of the registry; returns (healthz_s, readyz_s)."""
+        state = os.path.join(self.workdir, "state")
+        shutil.rmtree(state, ignore_errors=True)
+        os.makedirs(state)
+        for name in ("faiss_index.bin", "title_meta.bin"):
+            shutil.copy(os.path.join(self.registry_dir, name), state)
+
+        port = free_port()
+        env = {
+            **os.environ,
+            "MODEL_SERVICE_URL": self.model_url + "/embed",
+            "EMBEDDING_DIM": str(self.dimension),
+            "FAISS_INDEX_PATH": os.path.join(state, "faiss_index.bin"),
+            "FAISS_VECTORS_PATH": os.path.join(state, "faiss_vectors.npy"),
+            "TITLE_META_PATH": os.path.join(state, "title_meta.bin"),
+            "TITLE_IDS_PATH": os.path.join(state, "title_ids.json"),
+            "TITLE_LOG_PATH": os.path.join(state, "title_log.bin"),
+            "TITLES_DB_PATH": os.path.join(state, "titles.db"),
+            "EMBEDDING_CACHE_PATH": os.path.join(state, "embedding_cache.db"),
+            "SNAPSHOT_INTERVAL": "0",
+        }
+        args = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                "--log-level", "warning"]
+        if self.workers > 1:
+            env["SHARED_REGISTRY"] = "1"
+            args += ["--workers", str(self.workers)]
+
+        start = time.perf_counter()
+        self.backend = self._spawn(args, env, BACKEND_DIR, "backend.log")
+        self.backend_url = f"http://127.0.0.1:{port}"
+        wait_for(self.backend_url + "/healthz", timeout=120, expect_ok=False)
+        healthz = time.perf_counter() - start
+        wait_for(self.backend_url + "/readyz", timeout=600)
+        return healthz, time.perf_counter() - start
+
+    def backend_rss_mb(self):
+        # With --workers the parent only supervises; sum the whole process tree
+        pids = [self.backend.pid]
+        try:
+            with open(f"/proc/{self.backend.pid}/task/{self.backend.pid}/children") as f:
+                pids += [int(p) for p in f.read().split()]
+        except OSError:
+            pass
+        sizes = [rss_mb(pid) for pid in pids]
+        return round(sum(s for s in sizes if s is not None), 1) if any(s is not None for s in sizes) else None
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+
+async def run_level(url, queries, concurrency):
+    """Sends every query once with `concurrency` requests in flight; returns the level's stats."""
+    latencies = []
+    statuses = Counter()
+    pending = iter(queries)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        async def worker():
+            for title in pending:
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/verify", json={"title": title})
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(latencies) - statuses.get("200", 0),
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 2),
+            "p50": round(float(np.percentile(ms, 50)), 2),
+            "p90": round(float(np.percentile(ms, 90)), 2),
+            "p99": round(float(np.percentile(ms, 99)), 2),
+            "max": round(float(ms.max()), 2),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """One line per concurrency level: p50 / p99 / throughput, previous -> current."""
+    before = {level["concurrency"]: level for level in previous.get("levels", [])}
+    lines = [f"vs {previous['meta'].get('commit')}:"]
+    for key in ("ready_s", "rss_ready_mb"):
+        if previous.get("cold_start", {}).get(key) is not None and current["cold_start"].get(key) is not None:
+            lines.append(f"  {key}: {previous['cold_start'][key]} -> {current['cold_start'][key]}")
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        lines.append(
+            f"  c={level['concurrency']}: p50 {old['latency_ms']['p50']} -> {level['latency_ms']['p50']} ms, "
+            f"p99 {old['latency_ms']['p99']} -> {level['latency_ms']['p99']} ms, "
+            f"{old['throughput_rps']} -> {level['throughput_rps']} req/s"
+        )
+    return "\n".join(lines)
+
+
+def run(args):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "cold_start": {},
+        "levels": [],
+    }
+    real_titles = load_real_titles()
+    workdir = tempfile.mkdtemp(prefix="title-bench-")
+    services = None
+    try:
+        if args.backend_url:
+            url = args.backend_url
+            titles = generate_corpus(args.titles, args.seed, real_titles)
+        else:
+            # 1. Registry (reused across runs when --registry points at an existing one)
+            registry = args.registry or os.path.join(workdir, "registry")
+            titles = generate_corpus(args.titles, args.seed, real_titles)
+            if not os.path.exists(os.path.join(registry, "faiss_index.bin")):
+                start = time.perf_counter()
+                build_registry(titles, registry, args.dim)
+                print(f"Built {len(titles)}-title registry in {time.perf_counter() - start:.1f}s")
+
+            # 2. Services; cold start is timed from process spawn
+            services = Services(registry, workdir, args.dim, args.embed_latency_ms, args.workers)
+            services.start_model_service()
+            healthz_s, ready_s = services.start_backend()
+            url = services.backend_url
+            results["cold_start"] = {
+                "healthz_s": round(healthz_s, 3),
+                "ready_s": round(ready_s, 3),
+                "rss_ready_mb": services.backend_rss_mb(),
+            }
+            print(f"Backend ready in {ready_s:.2f}s (RSS {results['cold_start']['rss_ready_mb']} MB)")
+
+        # 3. Load levels; each level gets its own queries so no verdict is cached
+        queries = make_queries(titles, args.requests * len(args.concurrency), args.seed + 1, real_titles)
+        for i, concurrency in enumerate(args.concurrency):
+            level_queries = queries[i * args.requests:(i + 1) * args.requests]
+            asyncio.run(run_level(url, level_queries[:args.warmup], concurrency))
+            level = asyncio.run(run_level(url, level_queries[args.warmup:], concurrency))
+            results["levels"].append(level)
+            print(
+                f"c={concurrency}: p50 {level['latency_ms']['p50']} ms, p99 {level['latency_ms']['p99']} ms, "
+                f"{level['throughput_rps']} req/s, {level['errors']} errors"
+            )
+
+        if services is not None:
+            results["cold_start"]["rss_after_load_mb"] = services.backend_rss_mb()
+    finally:
+        if services is not None:
+            services.stop()
+        if args.keep_workdir:
+            print(f"Logs and state kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /verify against a synthetic registry")
+    parser.add_argument("--titles", type=int, default=12000, help="registry size")
+    parser.add_argument("--registry", default=None, help="registry dir to reuse (built there if missing)")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=20, help="requests per level excluded from the stats")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="simulated model latency")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend-url", default=None, help="benchmark a running backend instead")
+    parser.add_argument("--keep-workdir", action="store_true")
+    parser.add_argument("--output-json", default=None)
+    parser.add_argument("--compare", default=None, help="previous --output-json to diff against")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output_json:
+        with open(args.output_json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output_json}")
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), results))
@@ -0,0 +1,104 @@
+"""
+Cost of the rules pass versus rule-list size: the original per-rule Python loop
+against the compiled RuleSet used by backend/rules.py.
+
+    python benchmark/rules_scaling.py [--sizes 10 100 1000 10000] [--output-json rules.json]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from rule_matcher import RuleSet  # noqa: E402
+
+CORPUS_CSV = os.path.join(ROOT, "data_pipeline", "combined_preprocessed.csv")
+
+
+def naive_match(t, words, prefixes, periodicity):
+    """The pre-compilation check_rules scan, kept here as the baseline."""
+    found_words = [w for w in words if f" {w} " in f" {t} "]
+    edges = []
+    for prefix in prefixes:
+        if t.startswith(prefix + " "):
+            edges.append(("disallowed_prefix", prefix))
+        if t.endswith(" " + prefix):
+            edges.append(("disallowed_suffix", prefix))
+    found_periodicity = [p for p in periodicity if f" {p} " in f" {t} " or t.startswith(p + " ") or t.endswith(" " + p)]
+    return found_words, edges, found_periodicity
+
+
+def load_titles(limit=5000):
+    with open(CORPUS_CSV, "r", encoding="utf-8") as f:
+        titles = [row["Title Name (English)"].lower() for row in csv.DictReader(f) if row["Title Name (English)"]]
+    return titles[:limit]
+
+
+def make_rules(size, vocabulary, rng):
+    # Mostly real corpus words (so rules actually hit) plus some two-word phrases
+    words = set()
+    while len(words) < size:
+        if rng.random() < 0.2:
+            words.add(" ".join(rng.sample(vocabulary, 2)))
+        else:
+            words.add(rng.choice(vocabulary) + ("" if rng.random() < 0.5 else str(rng.randint(0, 999))))
+    words = sorted(words)
+    rng.shuffle(words)
+    prefixes = words[: max(1, size // 10)]
+    periodicity = ["daily", "weekly", "monthly", "fortnightly"]
+    return words, prefixes, periodicity
+
+
+def time_per_title(fn, titles, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t in titles:
+            fn(t)
+        best = min(best, time.perf_counter() - start)
+    return best / len(titles) * 1e6
+
+
+def run(sizes, num_titles=2000, seed=0):
+    rng = random.Random(seed)
+    titles = load_titles(num_titles)
+    vocabulary = sorted({w for t in titles for w in t.split()})
+
+    results = []
+    print(f"{'rules':>8} {'naive us/title':>16} {'compiled us/title':>18} {'speedup':>8}")
+    for size in sizes:
+        words, prefixes, periodicity = make_rules(size, vocabulary, rng)
+        compiled = RuleSet(words, prefixes, periodicity)
+
+        # Both implementations must report the same hits
+        for t in titles:
+            assert naive_match(t, words, prefixes, periodicity) == compiled.match(t), t
+
+        naive_us = time_per_title(lambda t: naive_match(t, words, prefixes, periodicity), titles)
+        compiled_us = time_per_title(compiled.match, titles)
+        results.append({
+            "rules": len(compiled),
+            "naive_us_per_title": round(naive_us, 3),
+            "compiled_us_per_title": round(compiled_us, 3),
+            "speedup": round(naive_us / compiled_us, 1),
+        })
+        print(f"{len(compiled):>8} {naive_us:>16.2f} {compiled_us:>18.2f} {naive_us / compiled_us:>7.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--output-json", default=None)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.titles)
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
@@ -8,7 +8,7 @@ def excel_to_csv(input_dir="raw_excel", output_dir="raw_csv"):
     """
     os.makedirs(output_dir, exist_ok=True)
     
-    excel_files = glob.glob(os.path.join(input_dir, "*.xlsx")) + glob.glob(os.path.join(input_dir, "*.xls"))
+    excel_files = sorted(glob.glob(os.path.join(input_dir, "*.xlsx")) + glob.glob(os.path.join(input_dir, "*.xls")))
     
     if not excel_files:
         print(f"No Excel files found in {input_dir}")
@@ -44,7 +44,12 @@ def merge_csvs(input_dir="raw_csv", output_file="combined_raw.csv"):
     """
     Step 2: Merges multiple CSV files, case-folds title columns, and removes duplicates.
     """
-    csv_files = glob.glob(os.path.join(input_dir, "file*.csv"))
+    # Numeric order (file2 before file10): a new export lands after the existing rows,
+    # so downstream steps can append to their previous output
+    csv_files = sorted(
+        glob.glob(os.path.join(input_dir, "file*.csv")),
+        key=lambda path: int("".join(ch for ch in os.path.basename(path) if ch.isdigit()) or 0)
+    )
     
     if not csv_files:
         print(f"No CSV files found in {input_dir}")
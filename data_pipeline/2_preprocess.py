@@ -1,7 +1,16 @@
-import pandas as pd
+import argparse
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
 import jellyfish
-from langdetect import detect
+from langdetect import detect, DetectorFactory
+
+# langdetect is randomized; a fixed seed makes runs reproducible (serial or parallel)
+DetectorFactory.seed = 0
 
 STOPWORDS = {"today", "news", "india", "samachar", "daily", "the"}
 PERIODICITY_MAP = {
@@ -9,6 +18,9 @@ PERIODICITY_MAP = {
     "annual": "A", "bi-weekly": "BW", "quarterly": "Q"
 }
 
+# A stopword as a whole space-separated word (text is already single-spaced)
+STOPWORDS_RE = re.compile(r"(?:^| )(?:" + "|".join(sorted(STOPWORDS)) + r")(?= |$)")
+
 def clean_text(text):
     if not isinstance(text, str): return ""
     # Lowercase
@@ -17,12 +29,25 @@ def clean_text(text):
     text = re.sub(r'[^\w\s]', '', text)
     # Remove extra spaces
     text = re.sub(r'\s+', ' ', text).strip()
-    
+
     # Remove stopwords
     words = text.split()
     filtered_words = [w for w in words if w not in STOPWORDS]
     return " ".join(filtered_words)
 
+def clean_series(series):
+    """Vectorized clean_text: same output row for row, using pandas string methods."""
+    is_str = series.map(lambda v: isinstance(v, str))
+    text = series.where(is_str, "").astype(object)
+    return (
+        text.str.lower()
+        .str.replace(r'[^\w\s]', '', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+        .str.replace(STOPWORDS_RE, '', regex=True)
+        .str.strip()
+    )
+
 def normalize_periodicity(p_string):
     if not isinstance(p_string, str): return "U" # Unknown
     p = p_string.lower().strip()
@@ -37,44 +62,91 @@ def get_language(text):
     except:
         return "unknown"
 
-def preprocess_titles(input_csv="combined_raw.csv", output_csv="combined_preprocessed.csv"):
+def get_phonetics(t):
+    if not t: return "", ""
+    return jellyfish.metaphone(t), jellyfish.soundex(t)
+
+def _languages(texts):
+    return [get_language(t) for t in texts]
+
+def _phonetics(texts):
+    return [get_phonetics(t) for t in texts]
+
+def _map_chunks(fn, values, pool, chunk_size):
+    # Runs fn over consecutive chunks (in the pool if there is one) and concatenates in order
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    mapped = pool.map(fn, chunks) if pool is not None else map(fn, chunks)
+    return [item for chunk in mapped for item in chunk]
+
+@contextmanager
+def timed(timings, step):
+    print(f"{step}...")
+    start = time.perf_counter()
+    yield
+    timings[step] = time.perf_counter() - start
+
+def preprocess_titles(input_csv="combined_raw.csv", output_csv="combined_preprocessed.csv", workers=None, chunk_size=1000):
     """
     Step 3: Cleans & Preprocesses raw merged titles.
     Generates: title_en_clean, title_hi_clean, phonetics, language.
+    Cleaning is vectorized; language detection and phonetic codes run in a
+    process pool over chunks of rows (workers=1 keeps everything in-process).
     """
-    print(f"Loading {input_csv} for preprocessing...")
-    df = pd.read_csv(input_csv)
-    
-    # 1. Clean Titles
-    print("Cleaning English Titles...")
-    df["title_en_clean"] = df["Title Name (English)"].apply(clean_text)
-    
-    print("Cleaning Hindi Titles...")
-    df["title_hi_clean"] = df["Hindi Title"].apply(clean_text)
-    
-    # 2. Extract normalized periodicity tag
-    print("Normalizing periodicity tags...")
-    if "Periodicity" in df.columns:
-        df["periodicity_tag"] = df["Periodicity"].apply(normalize_periodicity)
-    else:
-        df["periodicity_tag"] = "U"
-        
-    # 3. Detect Language on English / Hindi Fields just in case
-    print("Detecting mixed script languages...")
-    df["detected_lang_en"] = df["title_en_clean"].apply(get_language)
-    
-    # 4. Phonetic Codes (Only on English clean strings for accuracy)
-    print("Generating Metaphone and Soundex codes...")
-    def get_phonetics(t):
-        if not t: return "", ""
-        return jellyfish.metaphone(t), jellyfish.soundex(t)
-
-    phonetics = df["title_en_clean"].apply(get_phonetics)
-    df["metaphone_code"] = [p[0] for p in phonetics]
-    df["soundex_code"] = [p[1] for p in phonetics]
-    
-    df.to_csv(output_csv, index=False, encoding="utf-8")
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        with timed(timings, f"Loading {input_csv}"):
+            df = pd.read_csv(input_csv)
+
+        # 1. Clean Titles
+        with timed(timings, "Cleaning English Titles"):
+            df["title_en_clean"] = clean_series(df["Title Name (English)"])
+
+        with timed(timings, "Cleaning Hindi Titles"):
+            df["title_hi_clean"] = clean_series(df["Hindi Title"])
+
+        # 2. Extract normalized periodicity tag
+        with timed(timings, "Normalizing periodicity tags"):
+            if "Periodicity" in df.columns:
+                df["periodicity_tag"] = df["Periodicity"].map(normalize_periodicity)
+            else:
+                df["periodicity_tag"] = "U"
+
+        english = df["title_en_clean"].tolist()
+
+        # 3. Detect Language on English / Hindi Fields just in case
+        # (seeded, so each distinct title only needs detecting once)
+        with timed(timings, "Detecting mixed script languages"):
+            unique = list(dict.fromkeys(english))
+            languages = dict(zip(unique, _map_chunks(_languages, unique, pool, chunk_size)))
+            df["detected_lang_en"] = [languages[t] for t in english]
+
+        # 4. Phonetic Codes (Only on English clean strings for accuracy)
+        with timed(timings, "Generating Metaphone and Soundex codes"):
+            phonetics = _map_chunks(_phonetics, english, pool, chunk_size)
+            df["metaphone_code"] = [p[0] for p in phonetics]
+            df["soundex_code"] = [p[1] for p in phonetics]
+
+        with timed(timings, f"Writing {output_csv}"):
+            df.to_csv(output_csv, index=False, encoding="utf-8")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
     print(f"Preprocessing Complete. Saved '{output_csv}' with shape {df.shape}")
+    print(f"\nTiming ({len(df)} rows, {workers} worker{'s' if workers > 1 else ''}):")
+    for step, seconds in timings.items():
+        print(f"  {step:<45} {seconds:8.2f}s")
+    print(f"  {'Total':<45} {sum(timings.values()):8.2f}s")
 
 if __name__ == "__main__":
-    preprocess_titles()
+    parser = argparse.ArgumentParser(description="Clean titles and add language / phonetic columns.")
+    parser.add_argument("--input", default="combined_raw.csv")
+    parser.add_argument("--output", default="combined_preprocessed.csv")
+    parser.add_argument("--workers", type=int, default=None, help="processes for language detection and phonetics (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per task sent to a worker")
+    args = parser.parse_args()
+
+    preprocess_titles(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size)
@@ -1,7 +1,11 @@
+import argparse
 import json
 import os
+import random
+import time
+import numpy as np
 import torch
-from sentence_transformers import SentenceTransformer, InputExample, losses
+from sentence_transformers import SentenceTransformer, InputExample, losses, models
 from torch.utils.data import DataLoader
 
 def train_model(
@@ -74,5 +78,179 @@ def train_model(
     model.save(output_dir)
     print(f"Successfully saved to {output_dir}. You can now load this model in your pipeline.")
 
+def load_pairs(data_path):
+    with open(data_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [tuple(pair) for kind in ("positive", "weak_positive", "negative") for pair in data.get(kind, []) if len(pair) == 2]
+
+def truncate_layers(model, keep):
+    # Keeps `keep` evenly spaced transformer layers (first and last included)
+    transformer = model[0].auto_model
+    layers = transformer.encoder.layer
+    if keep >= len(layers):
+        return
+    picked = sorted({round(i * (len(layers) - 1) / (keep - 1)) for i in range(keep)}) if keep > 1 else [len(layers) - 1]
+    transformer.encoder.layer = torch.nn.ModuleList([layers[i] for i in picked])
+    transformer.config.num_hidden_layers = len(picked)
+    print(f"Student keeps transformer layers {picked} of {len(layers)}.")
+
+def pca_projection(vectors, dimension):
+    # Principal axes of the teacher vectors, uncentred so the projection x @ components.T
+    # preserves dot products (and so the cosine scale the thresholds were tuned on)
+    _, singular, vt = np.linalg.svd(vectors, full_matrices=False)
+    kept = float(np.sum(singular[:dimension] ** 2) / np.sum(singular ** 2))
+    return vt[:dimension].astype(np.float32), kept
+
+def agreement_report(teacher_embs, student_embs, pairs, sentences, top_k=5):
+    """Compares teacher and student on held-out pairs: pair scores and nearest-neighbour retrieval."""
+    def unit(v):
+        return v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+
+    teacher, student = unit(teacher_embs), unit(student_embs)
+    row = {s: i for i, s in enumerate(sentences)}
+    a = np.array([row[p[0]] for p in pairs])
+    b = np.array([row[p[1]] for p in pairs])
+    teacher_scores = np.sum(teacher[a] * teacher[b], axis=1)
+    student_scores = np.sum(student[a] * student[b], axis=1)
+
+    def ranks(x):
+        return np.argsort(np.argsort(x))
+
+    # Retrieval over the held-out titles: does the student find the teacher's nearest neighbour?
+    queries = np.unique(a)
+    teacher_sim = teacher[queries] @ teacher.T
+    student_sim = student[queries] @ student.T
+    teacher_sim[np.arange(len(queries)), queries] = -np.inf
+    student_sim[np.arange(len(queries)), queries] = -np.inf
+    teacher_top1 = np.argmax(teacher_sim, axis=1)
+    student_topk = np.argsort(-student_sim, axis=1)[:, :top_k]
+
+    return {
+        "heldout_pairs": len(pairs),
+        "heldout_titles": len(sentences),
+        "pair_score_pearson": round(float(np.corrcoef(teacher_scores, student_scores)[0, 1]), 4),
+        "pair_score_spearman": round(float(np.corrcoef(ranks(teacher_scores), ranks(student_scores))[0, 1]), 4),
+        "pair_score_mean_abs_diff": round(float(np.mean(np.abs(teacher_scores - student_scores))), 4),
+        "top1_neighbour_agreement": round(float(np.mean(student_topk[:, 0] == teacher_top1)), 4),
+        f"teacher_top1_in_student_top{top_k}": round(float(np.mean(np.any(student_topk == teacher_top1[:, None], axis=1))), 4),
+    }
+
+def titles_per_sec(model, sentences, batch_size):
+    start = time.perf_counter()
+    model.encode(sentences, batch_size=batch_size, show_progress_bar=False)
+    return round(len(sentences) / (time.perf_counter() - start), 1)
+
+def distill_model(
+    teacher_dir="trained-title-model",
+    data_path="training_pairs.json",
+    output_dir="student-title-model",
+    layers=6,
+    dimension=128,
+    epochs=1,
+    batch_size=64,
+    holdout=0.1,
+    seed=0
+):
+    """
+    Step 5b: Distills the fine-tuned teacher into a smaller student.
+    The student is a copy of the teacher keeping `layers` of its transformer layers,
+    followed by a Dense projection to `dimension` initialised from a PCA of the teacher
+    embeddings. It is trained with MSE to reproduce the teacher's PCA-projected
+    embeddings of the training titles, then compared with the teacher on held-out pairs.
+    Either reduction can be skipped with layers=None / dimension=None.
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"Loading teacher model: {teacher_dir} (device: {device})...")
+    teacher = SentenceTransformer(teacher_dir, device=device)
+
+    # 1. Split pairs; held-out titles are never trained on
+    try:
+        pairs = load_pairs(data_path)
+    except FileNotFoundError:
+        print(f"Error: {data_path} not found. Generate pairs first.")
+        return
+    random.Random(seed).shuffle(pairs)
+    heldout_pairs = pairs[:max(1, int(len(pairs) * holdout))]
+    heldout_titles = list(dict.fromkeys(t for pair in heldout_pairs for t in pair))
+    heldout_set = set(heldout_titles)
+    train_titles = list(dict.fromkeys(t for pair in pairs[len(heldout_pairs):] for t in pair if t not in heldout_set))
+    if not train_titles:
+        print("No training titles left after the held-out split.")
+        return
+    print(f"{len(train_titles)} training titles, {len(heldout_pairs)} held-out pairs ({len(heldout_titles)} titles).")
+
+    # 2. Teacher targets, reduced by PCA when the student is narrower
+    print("Encoding training titles with the teacher...")
+    targets = teacher.encode(train_titles, batch_size=batch_size, show_progress_bar=True, convert_to_numpy=True)
+    teacher_dim = targets.shape[1]
+    projection = None
+    if dimension and dimension < teacher_dim:
+        if dimension > len(train_titles):
+            print(f"Error: need at least {dimension} training titles for a {dimension}-dim PCA projection.")
+            return
+        projection, kept = pca_projection(targets, dimension)
+        targets = targets @ projection.T
+        print(f"Projecting {teacher_dim} -> {dimension} dims (PCA keeps {kept:.1%} of the energy).")
+
+    # 3. Build the student: fewer layers + PCA-initialised projection
+    student = SentenceTransformer(teacher_dir, device=device)
+    if layers:
+        truncate_layers(student, layers)
+    if projection is not None:
+        dense = models.Dense(
+            in_features=teacher_dim, out_features=dimension, bias=False,
+            activation_function=torch.nn.Identity()
+        )
+        dense.linear.weight.data = torch.from_numpy(projection)
+        student = SentenceTransformer(modules=[*student, dense], device=device)
+
+    # 4. Train the student to reproduce the teacher embeddings
+    train_examples = [InputExample(texts=[t], label=v) for t, v in zip(train_titles, targets)]
+    train_dataloader = DataLoader(train_examples, shuffle=True, batch_size=batch_size)
+    train_loss = losses.MSELoss(model=student)
+    print(f"Starting Distillation for {epochs} Epoch(s)...")
+    student.fit(
+        train_objectives=[(train_dataloader, train_loss)],
+        epochs=epochs,
+        warmup_steps=100,
+        show_progress_bar=True
+    )
+
+    print(f"Distillation complete. Saving student model to {output_dir}/")
+    os.makedirs(output_dir, exist_ok=True)
+    student.save(output_dir)
+
+    # 5. Agreement with the teacher on the held-out pairs
+    report = agreement_report(
+        teacher.encode(heldout_titles, batch_size=batch_size),
+        student.encode(heldout_titles, batch_size=batch_size),
+        heldout_pairs, heldout_titles
+    )
+    report.update({
+        "teacher": {"layers": teacher[0].auto_model.config.num_hidden_layers, "dimension": teacher_dim,
+                    "titles_per_sec": titles_per_sec(teacher, heldout_titles, batch_size)},
+        "student": {"layers": student[0].auto_model.config.num_hidden_layers,
+                    "dimension": student.get_sentence_embedding_dimension(),
+                    "titles_per_sec": titles_per_sec(student, heldout_titles, batch_size)},
+    })
+    with open(os.path.join(output_dir, "distill_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report, indent=4))
+    print(f"Embed with it via: python 5_embed_titles.py --model {output_dir}")
+    return report
+
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Fine-tune the title model, or distill it into a smaller student.")
+    parser.add_argument("--distill", action="store_true", help="distill --teacher into --output instead of fine-tuning")
+    parser.add_argument("--teacher", default="trained-title-model")
+    parser.add_argument("--output", default=None, help="default: trained-title-model, or student-title-model with --distill")
+    parser.add_argument("--layers", type=int, default=6, help="--distill: transformer layers kept (0 = all)")
+    parser.add_argument("--dimension", type=int, default=128, help="--distill: output dimension (0 = teacher's)")
+    parser.add_argument("--epochs", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.distill:
+        distill_model(args.teacher, output_dir=args.output or "student-title-model",
+                      layers=args.layers or None, dimension=args.dimension or None, epochs=args.epochs or 1)
+    else:
+        train_model(output_dir=args.output or "trained-title-model", epochs=args.epochs or 2)
@@ -1,58 +1,92 @@
 import pandas as pd
 import numpy as np
-import json
 import torch
 from sentence_transformers import SentenceTransformer
+import argparse
+import json
 import os
+import sys
+
+# Compact metadata format shared with the backend (backend/title_meta.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from title_meta import TitleMetaWriter, write_title_meta, STRING_COLUMNS, CODE_COLUMNS
+
+def load_model(model_path=None):
+    # Returns (model, source) so callers can tell which one they got
+    if model_path:
+        # An explicit choice (e.g. the distilled student-title-model) has no fallback
+        print(f"Loading SentenceTransformer Model '{model_path}'...")
+        return SentenceTransformer(model_path), model_path
 
-def create_embeddings(
-    input_csv="combined_preprocessed.csv",
-    model_path="paraphrase-multilingual-MiniLM-L12-v2", # Changed default model_path
-    output_npy="title_embeddings.npy",
-    output_json="title_ids.json"
-):
-    """
-    Loads the NLP model and generates embeddings for every title in the preprocessed CSV.
-    """
     # Try to load local model, fallback to HuggingFace
     print(f"Loading SentenceTransformer Model...")
     try:
         model = SentenceTransformer("trained-title-model/")
         print("Loaded customized PRGI trained-title-model/")
+        return model, "trained-title-model/"
     except Exception:
         print("Custom model missing/failed, falling back to base 'paraphrase-multilingual-MiniLM-L12-v2'")
         model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        return model, "paraphrase-multilingual-MiniLM-L12-v2"
+
+def get_best_target_string(row):
+    # Priority: Cleaned English -> Cleaned Hindi -> Raw English
+    if pd.notna(row.get("title_en_clean")) and str(row["title_en_clean"]).strip():
+        return str(row["title_en_clean"])
+    elif pd.notna(row.get("title_hi_clean")) and str(row["title_hi_clean"]).strip():
+        return str(row["title_hi_clean"])
+    return str(row.get("Title Name (English)", "unknown_title"))
+
+def read_titles(input_csv, columns=None, chunk_size=None):
+    # Every column as text, in every mode: a numeric-looking title stays "1947"
+    # instead of becoming 1947.0 in a column that also has blank cells
+    usecols = (lambda c: c in columns) if columns else None
+    return pd.read_csv(input_csv, usecols=usecols, dtype=str, chunksize=chunk_size)
+
+def embedding_targets(df):
+    """The string embedded for each row."""
+    return df.apply(get_best_target_string, axis=1).tolist()
+
+def title_metadata(df):
+    """Metadata columns for title_meta.bin (row id = FAISS id)."""
+    def column_as_str(name):
+        if name not in df.columns:
+            return [""] * len(df)
+        # str() per value keeps missing cells as "nan", like the old per-row export
+        return [str(v) for v in df[name].tolist()]
+
+    return {
+        "original_english": column_as_str("Title Name (English)"),
+        "original_hindi": column_as_str("Hindi Title"),
+        "state": column_as_str("State"),
+        "periodicity": column_as_str("Periodicity"),
+    }
+
+def create_embeddings(
+    input_csv="combined_preprocessed.csv",
+    model_path=None, # None = trained-title-model/, else the base model
+    output_npy="title_embeddings.npy",
+    output_meta="title_meta.bin"
+):
+    """
+    Loads the NLP model and generates embeddings for every title in the preprocessed CSV.
+    """
+    model, _ = load_model(model_path)
 
     print(f"Loading processed dataset '{input_csv}'...")
     try:
-        df = pd.read_csv(input_csv)
+        df = read_titles(input_csv)
     except FileNotFoundError:
         print(f"Error: {input_csv} not found.")
         return
 
     # Extract target titles to embed
-    # Priority: Cleaned English -> Cleaned Hindi -> Raw English
-    def get_best_target_string(row):
-        if pd.notna(row.get("title_en_clean")) and str(row["title_en_clean"]).strip():
-            return str(row["title_en_clean"])
-        elif pd.notna(row.get("title_hi_clean")) and str(row["title_hi_clean"]).strip():
-            return str(row["title_hi_clean"])
-        return str(row.get("Title Name (English)", "unknown_title"))
-
     print("Extracting strings to embed...")
-    targets = df.apply(get_best_target_string, axis=1).tolist()
+    targets = embedding_targets(df)
     
-    # Track the metadata / ids for searching
-    title_metadata = []
+    # Track the metadata / ids for searching (row id = FAISS id)
     print("Extracting metadata...")
-    for idx, row in df.iterrows():
-        title_metadata.append({
-            "idx": idx,
-            "original_english": str(row.get("Title Name (English)", "")),
-            "original_hindi": str(row.get("Hindi Title", "")),
-            "state": str(row.get("State", "")),
-            "periodicity": str(row.get("Periodicity", ""))
-        })
+    metadata = title_metadata(df)
 
     # Encode in batches to save memory
     print(f"Generating embeddings for {len(targets)} titles...")
@@ -64,11 +98,140 @@ def create_embeddings(
     print(f"Saving embeddings array to {output_npy} (Shape: {embeddings.shape})...")
     np.save(output_npy, embeddings)
 
-    print(f"Saving Title metadata to {output_json}...")
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(title_metadata, f, indent=4)
+    print(f"Saving Title metadata to {output_meta}...")
+    write_title_meta(output_meta, metadata)
 
     print("Embedding Generation Complete.")
 
+# Columns each streaming pass needs
+META_SOURCE_COLUMNS = {"Title Name (English)", "Hindi Title", "State", "Periodicity"}
+TARGET_SOURCE_COLUMNS = {"title_en_clean", "title_hi_clean", "Title Name (English)"}
+
+def model_fingerprint(source):
+    # A retrained local model gets a new mtime, which invalidates old checkpoints
+    if os.path.isdir(source):
+        return f"{source}@{max(os.path.getmtime(os.path.join(source, f)) for f in os.listdir(source))}"
+    return source
+
+def stream_embeddings(
+    input_csv="combined_preprocessed.csv",
+    output_npy="title_embeddings.npy",
+    output_meta="title_meta.bin",
+    model_path=None,
+    chunk_size=10000,
+    batch_size=256,
+    workers=1,
+    reuse=None
+):
+    """
+    Streaming variant of create_embeddings: reads the CSV in chunks and writes each
+    chunk's vectors straight into a preallocated .npy memmap, so memory does not grow
+    with the corpus; the metadata is spooled to disk chunk by chunk as well.
+    Progress is checkpointed after every chunk; rerunning the same command after a
+    crash resumes at the first unfinished row. workers > 1 encodes on that many
+    CPU processes.
+
+    `reuse(start, targets)` may supply vectors computed earlier: it returns a bool
+    mask over `targets` (rows start, start + 1, ...) and the vectors of the masked
+    rows; only the others are encoded. Returns the number of rows encoded.
+    """
+    model, source = load_model(model_path)
+
+    # 1. First pass: row count, and the metadata spooled to disk (published in step 4)
+    print(f"Scanning '{input_csv}'...")
+    with TitleMetaWriter(output_meta, STRING_COLUMNS + CODE_COLUMNS) as metadata:
+        for chunk in read_titles(input_csv, META_SOURCE_COLUMNS, chunk_size):
+            metadata.append(title_metadata(chunk))
+        encoded = embed_rows(input_csv, output_npy, metadata.rows, model, source, chunk_size, batch_size, workers, reuse)
+        print(f"Saving Title metadata to {output_meta}...")
+    os.remove(output_npy + ".checkpoint.json")
+
+    print("Embedding Generation Complete.")
+    return encoded
+
+def embed_rows(input_csv, output_npy, total_rows, model, source, chunk_size, batch_size, workers, reuse=None):
+    """Steps 2-4 of stream_embeddings: resumable, chunked encoding into output_npy."""
+    partial_npy = output_npy + ".partial"
+    checkpoint_path = output_npy + ".checkpoint.json"
+    dimension = model.get_sentence_embedding_dimension()
+
+    stat = os.stat(input_csv)
+    job = {
+        "input": os.path.abspath(input_csv),
+        "input_size": stat.st_size,
+        "input_mtime_ns": stat.st_mtime_ns,
+        "model": model_fingerprint(source),
+        "rows": total_rows,
+        "dimension": dimension,
+    }
+
+    # 2. Resume if the checkpoint belongs to the same input and model
+    done = 0
+    if os.path.exists(checkpoint_path) and os.path.exists(partial_npy):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if {key: checkpoint.get(key) for key in job} == job:
+            done = checkpoint["done"]
+            print(f"Resuming from checkpoint: {done}/{total_rows} rows already embedded.")
+        else:
+            print("Checkpoint is for a different input or model; starting over.")
+    if done:
+        embeddings = np.lib.format.open_memmap(partial_npy, mode="r+")
+    else:
+        embeddings = np.lib.format.open_memmap(partial_npy, mode="w+", dtype=np.float32, shape=(total_rows, dimension))
+
+    encoded = 0
+    pool = model.start_multi_process_pool(["cpu"] * workers) if workers > 1 else None
+    try:
+        # 3. Second pass: embed the unfinished rows chunk by chunk
+        start = 0
+        for chunk in read_titles(input_csv, TARGET_SOURCE_COLUMNS, chunk_size):
+            end = start + len(chunk)
+            if end > done:
+                skip = max(done - start, 0)
+                targets = embedding_targets(chunk)[skip:]
+                vectors = np.empty((len(targets), dimension), dtype=np.float32)
+                todo = np.arange(len(targets))
+                if reuse is not None:
+                    found, previous = reuse(start + skip, targets)
+                    if found.any():
+                        vectors[found] = previous
+                    todo = np.flatnonzero(~found)
+                if len(todo):
+                    todo_targets = [targets[i] for i in todo]
+                    if pool is not None:
+                        vectors[todo] = model.encode_multi_process(todo_targets, pool, batch_size=batch_size)
+                    else:
+                        vectors[todo] = model.encode(todo_targets, batch_size=batch_size, show_progress_bar=False)
+                    encoded += len(todo)
+                embeddings[start + skip:end] = vectors
+                embeddings.flush()
+
+                done = end
+                with open(checkpoint_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({**job, "done": done}, f)
+                os.replace(checkpoint_path + ".tmp", checkpoint_path)
+                print(f"Embedded {done}/{total_rows} titles...")
+            start = end
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    # 4. Publish the finished array; the caller then publishes the metadata
+    del embeddings
+    os.replace(partial_npy, output_npy)
+    print(f"Saved embeddings array to {output_npy} (Shape: ({total_rows}, {dimension}))")
+    return encoded
+
 if __name__ == "__main__":
-    create_embeddings()
+    parser = argparse.ArgumentParser(description="Embed every title of the preprocessed CSV.")
+    parser.add_argument("--model", default=None, help="model to embed with (default: trained-title-model/, else the base model)")
+    parser.add_argument("--stream", action="store_true", help="chunked, memory-mapped and resumable")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="--stream: rows per chunk / checkpoint")
+    parser.add_argument("--workers", type=int, default=1, help="--stream: CPU processes used for encoding")
+    args = parser.parse_args()
+
+    if args.stream:
+        stream_embeddings(model_path=args.model, chunk_size=args.chunk_size, workers=args.workers)
+    else:
+        create_embeddings(model_path=args.model)
@@ -1,14 +1,151 @@
+import argparse
+import time
+
 import numpy as np
 import faiss
 import os
 
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+# How each vector is stored in the index: float32 as-is, float16, 8-bit scalar
+# quantization (4x smaller) or product quantization (pq_m bytes per vector)
+ENCODINGS = ("float32", "fp16", "sq8", "pq")
+
+def default_pq_m(dimension):
+    # ~8 dims per one-byte sub-quantizer; m must divide the dimension
+    m = max(1, dimension // 8)
+    while dimension % m:
+        m -= 1
+    return m
+
+def storage_factory(encoding, dimension, pq_m=None):
+    if encoding == "float32":
+        return "Flat"
+    if encoding == "fp16":
+        return "SQfp16"
+    if encoding == "sq8":
+        return "SQ8"
+    if encoding == "pq":
+        return f"PQ{pq_m or default_pq_m(dimension)}x8"
+    raise ValueError(f"Unknown encoding '{encoding}', expected one of {ENCODINGS}")
+
+def make_index(index_type, dimension, total_vectors, nlist=None, hnsw_m=32, encoding="float32", pq_m=None):
+    """
+    Builds an empty inner-product index of the requested type.
+    flat = exact brute force, hnsw = graph ANN (no training), ivf = inverted lists
+    over k-means centroids (needs train()). Any encoding other than float32 stores
+    compressed codes (sq8/pq need train()).
+    """
+    storage = storage_factory(encoding, dimension, pq_m)
+    if index_type == "flat":
+        if storage == "Flat":
+            return faiss.IndexFlatIP(dimension)
+        return faiss.index_factory(dimension, storage, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "hnsw":
+        return faiss.index_factory(dimension, f"HNSW{hnsw_m},{storage}", faiss.METRIC_INNER_PRODUCT)
+    if index_type == "ivf":
+        # Rule of thumb: ~4*sqrt(N) lists, at least 39 training points per centroid
+        if not nlist:
+            nlist = max(1, min(int(4 * np.sqrt(total_vectors)), total_vectors // 39))
+        return faiss.index_factory(dimension, f"IVF{nlist},{storage}", faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+def save_rerank_vectors(embeddings, output_npy, chunk_size=65536):
+    """
+    Writes L2-normalized float32 copies of `embeddings` (an array or memmap) to a .npy
+    that the backend memory-maps to re-score candidates from a compressed index.
+    """
+    tmp_path = output_npy + ".tmp"
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=embeddings.shape)
+    for start in range(0, len(embeddings), chunk_size):
+        chunk = np.array(embeddings[start:start + chunk_size], dtype=np.float32)
+        faiss.normalize_L2(chunk)
+        out[start:start + len(chunk)] = chunk
+    out.flush()
+    del out
+    os.replace(tmp_path, output_npy)
+
+def rerank(vectors, queries, ids, top_k):
+    # Exact inner products for the candidate ids, best top_k first (-1 = no candidate)
+    safe = np.where(ids >= 0, ids, 0)
+    scores = np.einsum("qkd,qd->qk", vectors[safe.ravel()].reshape(*ids.shape, -1), queries)
+    scores = np.where(ids >= 0, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+    return np.take_along_axis(scores, order, 1), np.take_along_axis(ids, order, 1)
+
+def benchmark_index(index, embeddings, top_k=5, num_queries=1000, seed=0, rerank_factor=None):
+    """
+    Reports recall@k of `index` against an exact IndexFlatIP over the same vectors,
+    plus single-query latency (p50/p99) and batched throughput for both. With
+    rerank_factor, also the recall and score error after re-scoring top_k*factor
+    candidates with the full-precision vectors (what the backend does).
+    """
+    rng = np.random.default_rng(seed)
+    num_queries = min(num_queries, embeddings.shape[0])
+    queries = embeddings[rng.choice(embeddings.shape[0], num_queries, replace=False)]
+    # Perturb the queries so they are near, not identical to, indexed titles
+    queries = queries + rng.normal(0, 0.02, queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    flat = faiss.IndexFlatIP(embeddings.shape[1])
+    flat.add(embeddings)
+
+    def measure(idx):
+        timings = []
+        for q in queries[:200]:
+            start = time.perf_counter()
+            idx.search(q.reshape(1, -1), top_k)
+            timings.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        _, ids = idx.search(queries, top_k)
+        qps = num_queries / (time.perf_counter() - start)
+        return ids, {
+            "p50_ms": round(float(np.percentile(timings, 50)), 4),
+            "p99_ms": round(float(np.percentile(timings, 99)), 4),
+            "batch_qps": round(qps, 1),
+        }
+
+    truth, flat_stats = measure(flat)
+    found, index_stats = measure(index)
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    index_stats["recall_at_k"] = round(hits / float(truth.size), 4)
+
+    print(f"Benchmark on {num_queries} queries (k={top_k}):")
+    print(f"  flat : p50 {flat_stats['p50_ms']} ms | p99 {flat_stats['p99_ms']} ms | {flat_stats['batch_qps']} q/s")
+    print(f"  index: p50 {index_stats['p50_ms']} ms | p99 {index_stats['p99_ms']} ms | "
+          f"{index_stats['batch_qps']} q/s | recall@{top_k} {index_stats['recall_at_k']}")
+
+    if rerank_factor:
+        true_scores, _ = flat.search(queries, top_k)
+        approx_scores, _ = index.search(queries, top_k)
+        _, candidates = index.search(queries, top_k * rerank_factor)
+        reranked_scores, reranked = rerank(embeddings, queries, candidates, top_k)
+        hits = sum(len(set(t) & set(f)) for t, f in zip(truth, reranked))
+        index_stats["reranked_recall_at_k"] = round(hits / float(truth.size), 4)
+        index_stats["top1_score_error"] = round(float(np.mean(np.abs(approx_scores[:, 0] - true_scores[:, 0]))), 5)
+        index_stats["reranked_top1_score_error"] = round(float(np.mean(np.abs(reranked_scores[:, 0] - true_scores[:, 0]))), 5)
+        print(f"  re-ranking top {top_k * rerank_factor}: recall@{top_k} {index_stats['reranked_recall_at_k']} | "
+              f"mean top-1 score error {index_stats['top1_score_error']} -> {index_stats['reranked_top1_score_error']}")
+    return {"flat": flat_stats, "index": index_stats}
+
 def build_faiss_index(
     input_npy="title_embeddings.npy", 
-    output_bin="faiss_index.bin"
+    output_bin="faiss_index.bin",
+    index_type="flat",
+    nlist=None,
+    nprobe=16,
+    hnsw_m=32,
+    ef_construction=200,
+    ef_search=64,
+    encoding="float32",
+    pq_m=None,
+    vectors_npy="faiss_vectors.npy",
+    benchmark=True
 ):
     """
     Step 7: Builds and saves a highly optimized FAISS Index for similarity search 
     using the generated PRGI title embeddings array.
+    With a compressed encoding the normalized float32 vectors are also written to
+    `vectors_npy`, which the backend memory-maps to re-rank the index's candidates.
     """
     print(f"Loading embeddings from '{input_npy}'...")
     try:
@@ -31,22 +168,69 @@ def build_faiss_index(
     print("Applying L2 Normalization for Cosine Similarity Mapping...")
     faiss.normalize_L2(embeddings)
 
-    # Initialize IndexFlatIP
-    # FlatIP calculates inner product, which = cosine similarity on normalized vectors.
-    print(f"Building FAISS IndexFlatIP({dimension})...")
-    index = faiss.IndexFlatIP(dimension)
+    # Inner product on normalized vectors = cosine similarity, for every index type
+    print(f"Building FAISS '{index_type}' index ({dimension} dims, {encoding} storage)...")
+    index = make_index(index_type, dimension, total_vectors, nlist=nlist, hnsw_m=hnsw_m, encoding=encoding, pq_m=pq_m)
+
+    if index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = ef_construction
+    if not index.is_trained:
+        print(f"Training {index_type} index ({encoding}) on {total_vectors} vectors...")
+        index.train(embeddings)
 
     # Add normalized vectors to the index
     print(f"Adding {total_vectors} normalized embedding vectors into the index...")
     index.add(embeddings)
 
+    # Default search-time parameters are serialized with the index;
+    # the backend can still override them (FAISS_NPROBE / FAISS_EF_SEARCH)
+    if index_type == "ivf":
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", nprobe)
+    elif index_type == "hnsw":
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", ef_search)
+
     print(f"Index built. Total vectors in FAISS index: {index.ntotal}")
 
+    compressed = encoding != "float32"
+    if benchmark and (index_type != "flat" or compressed):
+        benchmark_index(index, embeddings, rerank_factor=4 if compressed else None)
+
     # Save to disk
     print(f"Writing index binary file '{output_bin}' to disk...")
     faiss.write_index(index, output_bin)
+    index_mb = os.path.getsize(output_bin) / 1e6
+    print(f"Index size: {index_mb:.1f} MB (float32 vectors alone: {embeddings.nbytes / 1e6:.1f} MB).")
+
+    if compressed:
+        print(f"Writing full-precision vectors for re-ranking to '{vectors_npy}'...")
+        save_rerank_vectors(embeddings, vectors_npy)
+    elif os.path.exists(vectors_npy):
+        # An exact index needs no re-ranking; a leftover file would no longer match it
+        os.remove(vectors_npy)
     
     print("FAISS serialization complete.")
 
 if __name__ == "__main__":
-    build_faiss_index()
+    parser = argparse.ArgumentParser(description="Build the FAISS title index")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF: number of centroids (default ~4*sqrt(N))")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF: lists visited per query")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW: neighbours per node")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW: build-time beam width")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW: query-time beam width")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="float32", help="vector storage inside the index")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ: bytes per vector (default ~dimension/8)")
+    parser.add_argument("--no-benchmark", action="store_true", help="Skip the recall@5/latency report")
+    args = parser.parse_args()
+
+    build_faiss_index(
+        index_type=args.index_type,
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        hnsw_m=args.hnsw_m,
+        ef_construction=args.ef_construction,
+        ef_search=args.ef_search,
+        encoding=args.encoding,
+        pq_m=args.pq_m,
+        benchmark=not args.no_benchmark,
+    )
@@ -4,6 +4,11 @@ from sentence_transformers import SentenceTransformer
 import warnings
 import json
 import os
+import sys
+
+# Compact metadata format shared with the backend (backend/title_meta.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from title_meta import TitleMeta
 
 warnings.filterwarnings('ignore')
 
@@ -11,7 +16,7 @@ class TitleSearchEngine:
     def __init__(self, 
                  index_path="faiss_index.bin", 
                  model_path="trained-title-model", 
-                 metadata_path="title_ids.json"):
+                 metadata_path="title_meta.bin"):
         """
         Step 8: Load the FAISS Index, the Fine-Tuned NLP Encoder, and the Memory mapping ID dictionary 
         to execute semantic clustering.
@@ -30,10 +35,15 @@ class TitleSearchEngine:
         
         print(f"Loading Metadata from {metadata_path}...")
         try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                self.metadata = json.load(f)
+            if metadata_path.endswith(".json"):
+                # Legacy id file from older pipeline runs
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    self.metadata = json.load(f)
+            else:
+                # Memory-mapped; rows are decoded only when a search returns them
+                self.metadata = TitleMeta(metadata_path)
         except Exception as e:
-            raise Exception(f"Failed to load metadata json: {e}")
+            raise Exception(f"Failed to load metadata: {e}")
 
     def clean_query(self, query):
         import re
@@ -0,0 +1,358 @@
+"""
+Incremental runner for the data pipeline.
+
+Stages form a chain (excel -> merge -> preprocess -> pairs -> [train] -> embed -> index),
+each declaring its input and output files. A stage runs only when its fingerprint
+(content hashes of its inputs, its script and stage function, its parameters)
+changed since the last run, or one of its outputs is missing or was modified.
+State is kept in .pipeline_state.json next to this file.
+
+The embed stage keys every row by (model, embedded string) and reuses the stored
+vector when the key is unchanged, so a new monthly export only embeds its new
+titles. It streams the CSV in chunks into a memory-mapped array (resumable, see
+5_embed_titles.py --stream). The index stage appends those rows to the existing
+faiss_index.bin when the rows it was built from are still the leading rows.
+
+    python run_pipeline.py                 # run whatever is out of date
+    python run_pipeline.py --dry-run       # show the plan only
+    python run_pipeline.py --force embed   # re-run one stage (later ones follow if its outputs change)
+    python run_pipeline.py --train         # include fine-tuning (4_train_model.py)
+    python run_pipeline.py --distill       # embed with a distilled student of the model
+"""
+import argparse
+import functools
+import glob
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+
+import numpy as np
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".pipeline_state.json"
+MODEL_DIR = "trained-title-model"
+STUDENT_DIR = "student-title-model"
+BASE_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+PREPROCESSED_CSV = "combined_preprocessed.csv"
+EMBEDDINGS = "title_embeddings.npy"
+# One uint64 per embeddings row: hash of (model fingerprint, embedded string)
+ROW_KEYS = "title_embeddings.keys.npy"
+INDEX = "faiss_index.bin"
+# Full-precision copy of the vectors, only for compressed index encodings
+RERANK_VECTORS = "faiss_vectors.npy"
+# Rows read, embedded and checkpointed at a time by the embed stage
+EMBED_CHUNK_ROWS = 10000
+
+def load_script(filename):
+    # The numbered scripts cannot be imported with an import statement. They are
+    # registered under their file name (with PIPELINE_DIR on sys.path) so that
+    # worker processes can unpickle their functions, whatever the start method
+    name = os.path.splitext(filename)[0]
+    if PIPELINE_DIR not in sys.path:
+        sys.path.insert(0, PIPELINE_DIR)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PIPELINE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+class FileHashes:
+    """sha256 of files and directories, re-hashed only when size or mtime changed."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def file(self, path):
+        stat = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path):
+        if not os.path.isdir(path):
+            return self.file(path)
+        digest = hashlib.sha256()
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).encode() + b"\0" + self.file(full).encode())
+        return digest.hexdigest()
+
+def expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    return paths
+
+def embedding_model_dir(args):
+    # The student with --distill; otherwise 5_embed_titles.py uses the fine-tuned
+    # model when it exists, else the base model
+    return STUDENT_DIR if args.distill else MODEL_DIR
+
+def model_fingerprint(hashes, model_dir):
+    if os.path.isdir(model_dir):
+        return "dir:" + hashes.path(model_dir)
+    return "hf:" + BASE_MODEL
+
+def row_keys(model_id, targets):
+    keys = np.empty(len(targets), dtype=np.uint64)
+    prefix = model_id.encode() + b"\0"
+    for i, target in enumerate(targets):
+        keys[i] = int.from_bytes(hashlib.blake2b(prefix + target.encode("utf-8"), digest_size=8).digest(), "little")
+    return keys
+
+def keys_digest(keys):
+    return hashlib.sha256(np.ascontiguousarray(keys).tobytes()).hexdigest()
+
+# --- Stage bodies: each returns a dict of extra state kept for the next run ---
+
+def run_excel(args, previous):
+    load_script("1_excel_to_clean_merge.py").excel_to_csv("raw_excel", "raw_csv")
+
+def run_merge(args, previous):
+    load_script("1_excel_to_clean_merge.py").merge_csvs("raw_csv", "combined_raw.csv")
+
+def run_preprocess(args, previous):
+    load_script("2_preprocess.py").preprocess_titles("combined_raw.csv", PREPROCESSED_CSV, workers=args.workers)
+
+def run_pairs(args, previous):
+    load_script("3_generate_pairs.py").generate_pairs(PREPROCESSED_CSV, "training_pairs.json")
+
+def run_train(args, previous):
+    load_script("4_train_model.py").train_model(data_path="training_pairs.json", output_dir=MODEL_DIR)
+
+def run_distill(args, previous):
+    load_script("4_train_model.py").distill_model(
+        MODEL_DIR if os.path.isdir(MODEL_DIR) else BASE_MODEL, data_path="training_pairs.json",
+        output_dir=STUDENT_DIR, layers=args.student_layers or None, dimension=args.student_dim or None
+    )
+
+def run_embed(args, previous, hashes):
+    # Fingerprinted only now, after any train/distill stage has rewritten the model
+    model_id = model_fingerprint(hashes, embedding_model_dir(args))
+    embed = load_script("5_embed_titles.py")
+    keys = np.concatenate([np.zeros(0, dtype=np.uint64)] + [
+        row_keys(model_id, embed.embedding_targets(chunk))
+        for chunk in embed.read_titles(PREPROCESSED_CSV, embed.TARGET_SOURCE_COLUMNS, EMBED_CHUNK_ROWS)
+    ])
+
+    # Vectors from the previous run, looked up by row key (sorted keys, not a dict)
+    old_keys = np.load(ROW_KEYS) if os.path.exists(ROW_KEYS) and os.path.exists(EMBEDDINGS) else np.zeros(0, dtype=np.uint64)
+    old_vectors = np.load(EMBEDDINGS, mmap_mode="r") if len(old_keys) else None
+    if old_vectors is not None and len(old_vectors) != len(old_keys):
+        print(f"{EMBEDDINGS} does not match {ROW_KEYS}; re-embedding everything.")
+        old_keys, old_vectors = np.zeros(0, dtype=np.uint64), None
+    order = np.argsort(old_keys, kind="stable")
+    sorted_keys = old_keys[order]
+
+    def reuse(start, targets):
+        wanted = keys[start:start + len(targets)]
+        if not len(sorted_keys):
+            return np.zeros(len(wanted), dtype=bool), None
+        pos = np.minimum(np.searchsorted(sorted_keys, wanted), len(sorted_keys) - 1)
+        found = sorted_keys[pos] == wanted
+        return found, old_vectors[order[pos[found]]]
+
+    # Streams the CSV into a memmap; only rows without a stored vector are encoded
+    encoded = embed.stream_embeddings(
+        PREPROCESSED_CSV, EMBEDDINGS, "title_meta.bin", model_path=STUDENT_DIR if args.distill else None,
+        chunk_size=EMBED_CHUNK_ROWS, reuse=reuse,
+    )
+    del old_vectors
+    np.save(ROW_KEYS, keys)
+    print(f"Embeddings: {encoded} computed, {len(keys) - encoded} reused ({len(keys)} rows).")
+
+def run_index(args, previous, params, hashes):
+    import faiss
+
+    keys = np.load(ROW_KEYS)
+    extra = previous.get("extra", {})
+    built_rows = extra.get("rows", 0)
+    appendable = (
+        os.path.exists(INDEX)
+        and extra.get("params") == params
+        and 0 < built_rows <= len(keys)
+        and keys_digest(keys[:built_rows]) == extra.get("keys_digest")
+        and hashes.file(INDEX) == previous.get("outputs", {}).get(INDEX)
+        and (params["encoding"] == "float32" or os.path.exists(RERANK_VECTORS))
+    )
+
+    build = load_script("6_build_faiss.py")
+    if appendable:
+        # Earlier rows unchanged: add only the new vectors to the existing index
+        # (a compressed index encodes them with its trained quantizer)
+        index = faiss.read_index(INDEX)
+        new_vectors = np.array(np.load(EMBEDDINGS, mmap_mode="r")[built_rows:], dtype=np.float32)
+        if len(new_vectors):
+            faiss.normalize_L2(new_vectors)
+            index.add(new_vectors)
+            faiss.write_index(index, INDEX)
+            if params["encoding"] != "float32":
+                build.save_rerank_vectors(np.load(EMBEDDINGS, mmap_mode="r"), RERANK_VECTORS)
+        print(f"Appended {len(new_vectors)} vectors to {INDEX} (now {index.ntotal}).")
+    else:
+        build.build_faiss_index(EMBEDDINGS, INDEX, vectors_npy=RERANK_VECTORS, benchmark=False, **params)
+
+    return {"rows": len(keys), "keys_digest": keys_digest(keys), "params": params}
+
+class Stage:
+    def __init__(self, name, script, inputs, outputs, run, params=None, own_outputs=True):
+        self.name = name
+        self.script = script
+        self.inputs = inputs
+        self.outputs = outputs
+        self.run = run
+        self.params = params or {}
+        # False when other files may legitimately appear among the outputs
+        # (CSV exports dropped straight into raw_csv/)
+        self.own_outputs = own_outputs
+
+    def fingerprint(self, hashes):
+        inputs = {path: hashes.path(path) for path in expand(self.inputs) if os.path.exists(path)}
+        # The stage body lives here, not in the numbered script: its source counts too
+        body = inspect.getsource(getattr(self.run, "func", self.run))
+        payload = {
+            "script": hashes.file(os.path.join(PIPELINE_DIR, self.script)),
+            "body": hashlib.sha256(body.encode()).hexdigest(),
+            "inputs": inputs,
+            "params": self.params,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def output_hashes(self, hashes):
+        return {path: hashes.path(path) for path in expand(self.outputs) if os.path.exists(path)}
+
+    def outputs_newer_than_inputs(self):
+        # First run over an existing checkout: like make, trust outputs newer than their inputs
+        inputs, outputs = expand(self.inputs), expand(self.outputs)
+        if not outputs or not all(os.path.exists(path) for path in outputs):
+            return False
+        newest_input = max((os.path.getmtime(path) for path in inputs if os.path.exists(path)), default=0)
+        return min(os.path.getmtime(path) for path in outputs) >= newest_input
+
+    def stale_reason(self, previous, hashes):
+        if not previous:
+            return None if self.outputs_newer_than_inputs() else "never run"
+        if previous["fingerprint"] != self.fingerprint(hashes):
+            return "inputs changed"
+        if not self.own_outputs:
+            return None
+        outputs = self.output_hashes(hashes)
+        if not outputs or any(path not in outputs for path in expand(self.outputs)):
+            return "output missing"
+        if outputs != previous["outputs"]:
+            return "output modified"
+        return None
+
+def build_stages(args, hashes):
+    index_params = {
+        "index_type": args.index_type, "nlist": args.nlist, "nprobe": args.nprobe,
+        "hnsw_m": args.hnsw_m, "ef_construction": args.ef_construction, "ef_search": args.ef_search,
+        "encoding": args.encoding, "pq_m": args.pq_m,
+    }
+    stages = [
+        Stage("excel", "1_excel_to_clean_merge.py", ["raw_excel/*.xls", "raw_excel/*.xlsx"], ["raw_csv/file*.csv"], run_excel, own_outputs=False),
+        Stage("merge", "1_excel_to_clean_merge.py", ["raw_csv/file*.csv"], ["combined_raw.csv"], run_merge),
+        Stage("preprocess", "2_preprocess.py", ["combined_raw.csv"], [PREPROCESSED_CSV], run_preprocess),
+        Stage("pairs", "3_generate_pairs.py", [PREPROCESSED_CSV], ["training_pairs.json"], run_pairs),
+    ]
+    if args.train:
+        stages.append(Stage("train", "4_train_model.py", ["training_pairs.json"], [MODEL_DIR], run_train))
+    if args.distill:
+        stages.append(Stage("distill", "4_train_model.py", ["training_pairs.json", MODEL_DIR], [STUDENT_DIR], run_distill,
+                            params={"layers": args.student_layers, "dimension": args.student_dim}))
+    # The model directory is an input, so a retrained model re-runs embed
+    model_dir = embedding_model_dir(args)
+    stages += [
+        Stage("embed", "5_embed_titles.py", [PREPROCESSED_CSV, model_dir], [EMBEDDINGS, ROW_KEYS, "title_meta.bin"],
+              functools.partial(run_embed, hashes=hashes), params={"model": model_dir}),
+        Stage("index", "6_build_faiss.py", [EMBEDDINGS, ROW_KEYS], [INDEX] + ([RERANK_VECTORS] if args.encoding != "float32" else []),
+              functools.partial(run_index, params=index_params, hashes=hashes), params=index_params),
+    ]
+    return stages
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {"stages": {}, "files": {}}
+    with open(STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, STATE_FILE)
+
+def run_pipeline(args):
+    os.chdir(PIPELINE_DIR)
+    state = load_state()
+    hashes = FileHashes(state["files"])
+    stages = build_stages(args, hashes)
+    unknown = set(args.force) - {stage.name for stage in stages}
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    pending_outputs = set()  # dry run: outputs an earlier stage would rewrite
+    for stage in stages:
+        previous = state["stages"].get(stage.name)
+        if stage.name in args.force:
+            reason = "forced"
+        elif args.dry_run and pending_outputs & set(stage.inputs):
+            reason = "after upstream stage"
+        else:
+            reason = stage.stale_reason(previous, hashes)
+
+        if reason is None:
+            print(f"[{stage.name}] up to date")
+            if previous is None and not args.dry_run:
+                # Adopted from an earlier manual run; record it so later changes are detected
+                state["stages"][stage.name] = {
+                    "fingerprint": stage.fingerprint(hashes),
+                    "outputs": stage.output_hashes(hashes),
+                    "extra": {},
+                }
+            continue
+        print(f"[{stage.name}] {'would run' if args.dry_run else 'running'} ({reason})")
+        if args.dry_run:
+            pending_outputs.update(stage.outputs)
+            continue
+
+        fingerprint = stage.fingerprint(hashes)
+        extra = stage.run(args, previous or {})
+        state["stages"][stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": stage.output_hashes(hashes),
+            "extra": extra or {},
+        }
+        save_state(state)
+
+    if not args.dry_run:
+        save_state(state)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the title pipeline, re-running only stages whose inputs changed.")
+    parser.add_argument("--dry-run", action="store_true", help="print which stages would run")
+    parser.add_argument("--force", nargs="*", default=[], metavar="STAGE", help="re-run these stages regardless")
+    parser.add_argument("--train", action="store_true", help="include fine-tuning the model (slow)")
+    parser.add_argument("--distill", action="store_true", help="distill the model into a smaller student and embed with it")
+    parser.add_argument("--student-layers", type=int, default=6, help="distill: transformer layers kept (0 = all)")
+    parser.add_argument("--student-dim", type=int, default=128, help="distill: output dimension (0 = unchanged)")
+    parser.add_argument("--workers", type=int, default=None, help="preprocess: worker processes")
+    parser.add_argument("--index-type", choices=["flat", "ivf", "hnsw"], default="flat")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--encoding", choices=["float32", "fp16", "sq8", "pq"], default="float32", help="index: vector storage")
+    parser.add_argument("--pq-m", type=int, default=None)
+    run_pipeline(parser.parse_args())
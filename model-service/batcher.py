@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text /embed requests into one model.encode call.
+    A request waits at most `max_wait_ms` (or until `max_batch_size` texts are
+    queued) before the batch is encoded on a dedicated thread and the rows are
+    handed back to each caller.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, max_wait_ms=5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._worker = None
+        # Single thread keeps batches serialized; requests arriving meanwhile form the next batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.batch_size_counts = {}
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            texts = [text for text, _, _ in batch]
+            try:
+                embeddings = await loop.run_in_executor(self._executor, self.encode_fn, texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), emb in zip(batch, embeddings):
+                # Caller may have disconnected while the batch was encoding
+                if not future.done():
+                    future.set_result(emb)
+
+    def _record(self, batch, started):
+        size = len(batch)
+        self.requests += size
+        self.batches += 1
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+        metrics.batch_size.labels("microbatch").observe(size)
+        for _, _, enqueued in batch:
+            wait = started - enqueued
+            metrics.queue_wait_seconds.observe(wait)
+            self.queue_wait_total += wait
+            self.queue_wait_max = max(self.queue_wait_max, wait)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "avg_queue_wait_ms": round(self.queue_wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+            "max_queue_wait_ms": round(self.queue_wait_max * 1000, 3),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
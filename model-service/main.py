@@ -1,21 +1,109 @@
-from fastapi import FastAPI
+import os
+import struct
+import time
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+import metrics
+from batcher import MicroBatcher
 
 app = FastAPI()
 
+# "torch" serves MODEL_NAME through SentenceTransformer; "onnx" serves the
+# int8-quantized export in ONNX_MODEL_DIR (see onnx_backend.py export)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+MODEL_NAME = os.getenv("MODEL_NAME", "paraphrase-multilingual-MiniLM-L12-v2")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.dirname(__file__), "onnx-model"))
+# Upper bound on sentences per model.encode forward pass for /embed_batch
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", 64))
+# Dynamic micro-batching of concurrent /embed calls
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 32))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 5))
+
 # Load a multilingual model to handle conceptual matching across languages globally
 model = None
+batcher = None
+metrics.register_gauges(lambda: batcher)
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    timings = metrics.start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, (time.perf_counter() - start) * 1000)
+    return response
 
 @app.on_event("startup")
 def load_model():
     global model
-    model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+    if EMBED_BACKEND == "onnx":
+        from onnx_backend import OnnxEncoder
+        model = OnnxEncoder(ONNX_MODEL_DIR)
+        print(f"Serving ONNX Runtime model from {ONNX_MODEL_DIR}")
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+
+@app.on_event("startup")
+async def start_batcher():
+    global batcher
+    batcher = MicroBatcher(
+        lambda texts: model.encode(texts, batch_size=MICROBATCH_MAX_SIZE),
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    )
+    batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+
+# Binary responses for callers that send this in Accept (the backend does):
+# "<II" (rows, dimension) header, then rows * dimension little-endian float32 values
+EMBEDDINGS_MEDIA_TYPE = "application/x-embeddings-f32"
+_HEADER = struct.Struct("<II")
+
+def _embeddings_response(request, key, vectors):
+    # JSON unless the caller asked for raw float32 (skips float -> text -> float)
+    if EMBEDDINGS_MEDIA_TYPE not in request.headers.get("accept", ""):
+        return {key: vectors.tolist()}
+    vectors = np.ascontiguousarray(vectors, dtype="<f4").reshape(-1, vectors.shape[-1])
+    return Response(_HEADER.pack(*vectors.shape) + vectors.tobytes(), media_type=EMBEDDINGS_MEDIA_TYPE)
 
 class InputText(BaseModel):
     text: str
 
+class InputTexts(BaseModel):
+    texts: List[str]
+
 @app.post("/embed")
-def embed(data: InputText):
-    embedding = model.encode([data.text])[0].tolist()
-    return {"embedding": embedding}
\ No newline at end of file
+async def embed(data: InputText, request: Request):
+    # Queued with other in-flight requests and encoded as one batch
+    with metrics.timed("batched_encode"):
+        embedding = await batcher.submit(data.text)
+    return _embeddings_response(request, "embedding", embedding)
+
+@app.post("/embed_batch")
+def embed_batch(data: InputTexts, request: Request):
+    # One call encodes the whole list, so bulk callers (startup seeding, imports)
+    # pay the per-request overhead once instead of once per title
+    if not data.texts:
+        return {"embeddings": []}
+    metrics.batch_size.labels("embed_batch").observe(len(data.texts))
+    with metrics.timed("encode"):
+        embeddings = model.encode(data.texts, batch_size=ENCODE_BATCH_SIZE)
+    return _embeddings_response(request, "embeddings", embeddings)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/stats")
+def stats():
+    # Micro-batching metrics: queue wait time and batch size distribution
+    return {"batcher": batcher.stats()}
@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Gauge, Histogram
+
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+stage_seconds = Histogram(
+    "embed_stage_seconds", "Time spent per stage of an embedding request", ["stage"], buckets=_BUCKETS
+)
+batch_size = Histogram(
+    "embed_batch_size", "Texts per model.encode call", ["source"], buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+queue_wait_seconds = Histogram(
+    "embed_queue_wait_seconds", "Time an /embed request waited for its micro-batch", buckets=_BUCKETS
+)
+
+# Per-request stage totals (ms) for the Server-Timing header; None outside a request
+_request_timings = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(stage):
+    """Observes the block's duration in stage_seconds and adds it to the current request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.labels(stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
+
+
+def start_request():
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings, total_ms):
+    entries = [f"{stage};dur={ms:.3f}" for stage, ms in timings.items()]
+    entries.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(entries)
+
+
+def register_gauges(get_batcher):
+    """Micro-batcher counters, read at scrape time (the batcher is created on startup)."""
+    gauge = Gauge("microbatcher", "Micro-batcher counters", ["counter"])
+    for counter in ("requests", "batches", "avg_batch_size", "avg_queue_wait_ms", "max_queue_wait_ms"):
+        gauge.labels(counter).set_function(
+            lambda counter=counter: get_batcher().stats()[counter] if get_batcher() is not None else 0
+        )
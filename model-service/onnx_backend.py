@@ -0,0 +1,223 @@
+"""
+Quantized ONNX Runtime inference backend for the embedding model.
+
+    python onnx_backend.py export [--model NAME_OR_PATH] [--output onnx-model]
+    python onnx_backend.py check  [--onnx-dir onnx-model] [--corpus CSV]
+
+`export` traces the full SentenceTransformer (transformer + pooling + any dense
+layers) to ONNX and applies dynamic int8 quantization. `check` compares the
+quantized model against PyTorch on the title corpus: per-title cosine agreement,
+single-request latency and batch throughput.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "../data_pipeline/combined_preprocessed.csv")
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+CONFIG_FILE = "onnx_config.json"
+
+
+class OnnxEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode backed by ONNX Runtime.
+    Only needs onnxruntime + tokenizers at serving time, not torch.
+    """
+
+    def __init__(self, model_dir, quantized=True, num_threads=0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.dimension = self.config["dimension"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = QUANTIZED_FILE if quantized else MODEL_FILE
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[start:start + batch_size])
+            feed = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            }
+            outputs.append(self.session.run(["sentence_embedding"], feed)[0])
+        return np.concatenate(outputs).astype(np.float32, copy=False)
+
+
+def export_onnx(model_name=DEFAULT_MODEL, output_dir="onnx-model", opset=14):
+    """
+    Exports a SentenceTransformer (base model or the fine-tuned trained-title-model)
+    to ONNX and writes a dynamically int8-quantized copy next to it.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    print(f"Loading SentenceTransformer '{model_name}' for export...")
+    model = SentenceTransformer(model_name, device="cpu")
+    model.eval()
+
+    class SentenceEmbedding(torch.nn.Module):
+        # Runs every module of the pipeline so pooling/projection live inside the graph
+        def __init__(self, st_model):
+            super().__init__()
+            self.st_model = st_model
+
+        def forward(self, input_ids, attention_mask):
+            features = self.st_model({"input_ids": input_ids, "attention_mask": attention_mask})
+            return features["sentence_embedding"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = model.tokenizer
+    sample = tokenizer(["sample title"], return_tensors="pt")
+
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    print(f"Exporting ONNX graph to {model_path}...")
+    torch.onnx.export(
+        SentenceEmbedding(model),
+        (sample["input_ids"], sample["attention_mask"]),
+        model_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["sentence_embedding"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "sentence_embedding": {0: "batch"},
+        },
+        opset_version=opset,
+    )
+
+    quantized_path = os.path.join(output_dir, QUANTIZED_FILE)
+    print(f"Applying dynamic int8 quantization -> {quantized_path}...")
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "source_model": model_name,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length,
+            "pad_token_id": tokenizer.pad_token_id,
+            "pad_token": tokenizer.pad_token,
+        }, f, indent=4)
+
+    size_mb = os.path.getsize(quantized_path) / 1e6
+    print(f"Export complete ({size_mb:.1f} MB quantized).")
+
+
+def load_corpus_titles(corpus_csv=DEFAULT_CORPUS, limit=None):
+    titles = []
+    with open(corpus_csv, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            title = (row.get("title_en_clean") or row.get("Title Name (English)") or "").strip()
+            if title:
+                titles.append(title)
+            if limit and len(titles) >= limit:
+                break
+    return titles
+
+
+def _latency_ms(encoder, titles, runs):
+    timings = []
+    for title in titles[:runs]:
+        start = time.perf_counter()
+        encoder.encode([title])
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(float(np.percentile(timings, 50)), 3),
+            "p99_ms": round(float(np.percentile(timings, 99)), 3)}
+
+
+def _throughput(encoder, titles, batch_size):
+    start = time.perf_counter()
+    encoder.encode(titles, batch_size=batch_size)
+    return round(len(titles) / (time.perf_counter() - start), 1)
+
+
+def check_parity(onnx_dir="onnx-model", corpus_csv=DEFAULT_CORPUS, limit=2000,
+                 latency_runs=200, batch_size=64, output_json=None):
+    """
+    Compares the quantized ONNX model against the PyTorch model it was exported
+    from: cosine agreement per title plus latency/throughput for both backends.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    onnx_encoder = OnnxEncoder(onnx_dir)
+    source_model = onnx_encoder.config["source_model"]
+    torch_encoder = SentenceTransformer(source_model, device="cpu")
+
+    titles = load_corpus_titles(corpus_csv, limit)
+    print(f"Comparing on {len(titles)} titles from {corpus_csv}...")
+
+    ref = torch_encoder.encode(titles, batch_size=batch_size)
+    got = onnx_encoder.encode(titles, batch_size=batch_size)
+    ref = ref / np.linalg.norm(ref, axis=1, keepdims=True)
+    got = got / np.linalg.norm(got, axis=1, keepdims=True)
+    cosines = np.sum(ref * got, axis=1)
+
+    # Does the quantized model keep each title's nearest neighbour?
+    sample = min(len(titles), 500)
+    ref_nn = np.argsort(-(ref[:sample] @ ref.T), axis=1)[:, 1]
+    got_nn = np.argsort(-(got[:sample] @ got.T), axis=1)[:, 1]
+
+    report = {
+        "source_model": source_model,
+        "titles": len(titles),
+        "cosine_mean": round(float(cosines.mean()), 5),
+        "cosine_min": round(float(cosines.min()), 5),
+        "cosine_p1": round(float(np.percentile(cosines, 1)), 5),
+        "top1_neighbour_agreement": round(float(np.mean(ref_nn == got_nn)), 4),
+        "pytorch": {**_latency_ms(torch_encoder, titles, latency_runs),
+                    "titles_per_sec": _throughput(torch_encoder, titles, batch_size)},
+        "onnx_int8": {**_latency_ms(onnx_encoder, titles, latency_runs),
+                      "titles_per_sec": _throughput(onnx_encoder, titles, batch_size)},
+    }
+    print(json.dumps(report, indent=4))
+    if output_json:
+        with open(output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX export and parity check for the embedding model")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export")
+    export_cmd.add_argument("--model", default=os.getenv("MODEL_NAME", DEFAULT_MODEL))
+    export_cmd.add_argument("--output", default="onnx-model")
+
+    check_cmd = sub.add_parser("check")
+    check_cmd.add_argument("--onnx-dir", default="onnx-model")
+    check_cmd.add_argument("--corpus", default=DEFAULT_CORPUS)
+    check_cmd.add_argument("--limit", type=int, default=2000)
+    check_cmd.add_argument("--output-json", default=None)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.model, args.output)
+    else:
+        check_parity(args.onnx_dir, args.corpus, args.limit, output_json=args.output_json)